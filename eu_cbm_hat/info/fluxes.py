@@ -64,11 +64,9 @@ class Fluxes:
         df = df.rename(columns={'dist_desc_input':'user_name'})
 
         # The user_desc is mapped to an aidb_name #
+        # A plain dictionary lookup, no need to build and merge a data frame #
         desc_name = self.country.associations.key_to_rows('MapDisturbanceType')
-        desc_name = pandas.DataFrame.from_dict(desc_name, orient='index',
-                                               columns=['aidb_name'])
-        df = pandas.merge(df, desc_name, how='left',
-                          left_on='user_name', right_index=True)
+        df['aidb_name'] = df['user_name'].map(desc_name)
 
         # The aidb_name is mapped to an aidb_id #
         name_id = self.country.aidb.db.read_df('disturbance_type_tr')
@@ -125,12 +123,14 @@ class Fluxes:
         df = df.fillna(0)
 
         # Modify column names #
-        df.columns = df.columns.to_series().apply(camel_to_snake)
         from eu_cbm_hat.cbm.dynamic import DynamicSimulation
         sources   = DynamicSimulation.sources
         self.cols = [pool + '_prod_prop' for pool in sources]
         mapping   = dict(zip(sources, self.cols))
-        df        = df.rename(columns = mapping)
+        # Snake case and source pool names in a single precomputed rename #
+        snake     = {col: camel_to_snake(col) for col in df.columns}
+        df        = df.rename(columns = {col: mapping.get(name, name)
+                                         for col, name in snake.items()})
 
         # We always want to have the eight source pool columns #
         for pool in self.cols:
@@ -421,7 +421,9 @@ class HarvestFactors(BaseSilvInfo):
         """
         index = ["scenario", "product_created"]
         cols = list(set(self.cols) - set(["product_created"]))
-        df_check = self.raw.groupby(index)[cols].agg(lambda x: len(x.isna().unique()))
+        # Number of distinct missing value states per group, in one pass over
+        # the boolean frame instead of one lambda call per group and column
+        df_check = self.raw[cols].isna().groupby([self.raw[x] for x in index]).nunique()
         for col in cols:
             if any(df_check[col] > 1):
                 df_wrong = df_check[df_check[col] > 1]
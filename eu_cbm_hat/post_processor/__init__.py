@@ -10,6 +10,7 @@ Unit D1 Bioeconomy.
 
 from typing import Union, List
 from functools import cached_property
+import numpy as np
 from eu_cbm_hat.post_processor.sink import Sink
 from eu_cbm_hat.post_processor.harvest import Harvest
 from eu_cbm_hat.post_processor.area import Area
@@ -132,7 +133,8 @@ class PostProcessor(object):
     def pools_morf(self):
         """Pools columns summed for merchantable, other, roots and foliage,
         across classifiers"""
-        df = self.pools.copy()
+        # Only copy the grouping columns, the sums are added to this frame
+        df = self.pools[self.index_morf + ["area"]].copy()
         column_dict = {
             "merch": ['softwood_merch', 'hardwood_merch'],
             "other": ["softwood_other", "hardwood_other"],
@@ -140,8 +142,10 @@ class PostProcessor(object):
                       "softwood_coarse_roots", "hardwood_coarse_roots"],
             "foliage": ["softwood_foliage", "hardwood_foliage"],
         }
+        # Row sums on the underlying array, missing values count as zero as
+        # in sum(axis=1)
         for key, cols in column_dict.items():
-            df[key] = df[cols].sum(axis=1)
+            df[key] = np.nansum(self.pools[cols].to_numpy(), axis=1)
         selected_columns = ["area"] + list(column_dict.keys())
         df_agg = df.groupby(self.index_morf)[selected_columns].agg("sum")
         df_agg = df_agg.reset_index()
@@ -151,24 +155,26 @@ class PostProcessor(object):
     def fluxes_morf(self):
         """Fluxes columns summed for merchantable to products, natural turnover
         (from merch and OWC) disturbance litter input (from merch and OWC)"""
-        df = self.fluxes.copy()
         #check this df
         column_dict = {
             "merch_prod": ["softwood_merch_to_product", "hardwood_merch_to_product"],
             # I add this flux to prod
             "oth_prod": ["softwood_other_to_product", "hardwood_other_to_product"],
         }
-        for key, cols in column_dict.items():
-            df[key] = df[cols].sum(axis=1)
-        selected_columns = list(column_dict.keys())
-        selected_columns += ["turnover_merch_litter_input",
-                             'turnover_oth_litter_input',
-                             "disturbance_merch_litter_input",
-                             'disturbance_oth_litter_input',
+        other_columns = ["turnover_merch_litter_input",
+                         'turnover_oth_litter_input',
+                         "disturbance_merch_litter_input",
+                         'disturbance_oth_litter_input',
 # I added two more flxues
-                             "disturbance_merch_to_air",
-                             "disturbance_oth_to_air"
-                             ]
+                         "disturbance_merch_to_air",
+                         "disturbance_oth_to_air"
+                         ]
+        # Only copy the grouping columns and the fluxes kept as they are
+        df = self.fluxes[self.index_morf + other_columns].copy()
+        # Row sums on the underlying array, see pools_morf
+        for key, cols in column_dict.items():
+            df[key] = np.nansum(self.fluxes[cols].to_numpy(), axis=1)
+        selected_columns = list(column_dict.keys()) + other_columns
         df_agg = df.groupby(self.index_morf)[selected_columns].agg("sum")
         df_agg = df_agg.reset_index()
         return df_agg
@@ -183,6 +189,20 @@ class PostProcessor(object):
         df = self.pools_morf.merge(self.fluxes_morf, on=self.index_morf)
         return df
 
+    @cached_property
+    def area_by_identifier_timestep(self):
+        """Area of the pools as a series indexed on identifier and timestep
+
+        There is one pools row for each identifier and timestep, so that other
+        tables can look up their area with reindex instead of a merge.
+        """
+        area = self.pools.set_index(["identifier", "timestep"])["area"]
+        if not area.index.is_unique:
+            msg = "The pools have more than one row for these identifier and timestep:\n"
+            msg += f"{area.index[area.index.duplicated()].unique().tolist()}"
+            raise ValueError(msg)
+        return area
+
     @cached_property
     def area(self):
         """Compute the forest carbon sink"""
@@ -96,11 +96,12 @@ and not have to wait to update all output tables for all scenarios.
 
 """
 
+from functools import partial
 from typing import Union, List
 import pandas
 import warnings
 from tqdm import tqdm
-from p_tqdm import p_umap
+from p_tqdm import p_map, p_umap
 from eu_cbm_hat.core.continent import continent
 from eu_cbm_hat.post_processor.convert import ton_carbon_to_m3_ob
 from eu_cbm_hat import eu_cbm_data_pathlib
@@ -139,23 +140,45 @@ def get_df_one_country(combo_name, iso2_code, runner_method_name, **kwargs):
     return df
 
 
-def apply_to_all_countries(data_func, combo_name, **kwargs):
-    """Apply a function to many countries"""
-    df_all = pandas.DataFrame()
-    country_codes = continent.combos[combo_name].runners.keys()
-    for key in tqdm(country_codes):
-        try:
-            df = data_func(combo_name, key, **kwargs)
-            df_all = pandas.concat([df, df_all])
-        except FileNotFoundError as e_file:
-            print(e_file)
-        except ValueError as e_value:
-            print(key, e_value)
-    df_all.reset_index(inplace=True, drop=True)
-    return df_all
+def apply_to_one_country(data_func, combo_name, key, **kwargs):
+    """Apply a function to one country, print errors instead of raising them
+
+    Returns None when the country's data is missing or invalid.
+    """
+    try:
+        return data_func(combo_name, key, **kwargs)
+    except FileNotFoundError as e_file:
+        print(e_file)
+    except ValueError as e_value:
+        print(key, e_value)
+    return None
 
 
-def get_df_all_countries(combo_name, runner_method_name, **kwargs):
+def apply_to_all_countries(data_func, combo_name, num_cpus=None, **kwargs):
+    """Apply a function to many countries
+
+    Countries are processed one after the other by default. Give num_cpus to
+    process them in parallel. Don't do it from apply_to_all_combos, which
+    already calls this function inside a pool of processes.
+
+    The *_all_countries functions of this module pass their num_cpus argument
+    to this function.
+
+    The data frames of all countries are concatenated once at the end.
+    """
+    country_codes = list(continent.combos[combo_name].runners.keys())
+    func = partial(apply_to_one_country, data_func, combo_name, **kwargs)
+    if num_cpus is None:
+        df_list = [func(key) for key in tqdm(country_codes)]
+    else:
+        df_list = p_map(func, country_codes, num_cpus=num_cpus)
+    df_list = [df for df in df_list if df is not None]
+    if not df_list:
+        return pandas.DataFrame()
+    return pandas.concat(df_list, ignore_index=True)
+
+
+def get_df_all_countries(combo_name, runner_method_name, num_cpus=None, **kwargs):
     """Get a data frame for all countries.
 
     Check wood density and bark fraction in all countries:
@@ -189,6 +212,7 @@ def get_df_all_countries(combo_name, runner_method_name, **kwargs):
         data_func=get_df_one_country,
         combo_name=combo_name,
         runner_method_name=runner_method_name,
+        num_cpus=num_cpus,
         **kwargs,
     )
     return df_all
@@ -477,9 +501,10 @@ def sink_one_country(
     Define a sink_all_countries function for the following examples
 
         >>> from eu_cbm_hat.post_processor.sink_all_countries import sink_one_country
-        >>> def sink_all_countries(combo_name, groupby):
+        >>> def sink_all_countries(combo_name, groupby, num_cpus=None):
         >>>     df_all = apply_to_all_countries(
-        >>>         sink_one_country, combo_name=combo_name, groupby=groupby
+        >>>         sink_one_country, combo_name=combo_name, groupby=groupby,
+        >>>         num_cpus=num_cpus,
         >>>     )
         >>>     return df_all
         >>> sink = sink_all_countries("reference", "year")
@@ -636,7 +661,9 @@ def area_by_age_class_one_country(combo_name: str, iso2_code: str, groupby: Unio
     df=df[['combo_name', 'iso2_code', 'country', 'year', 'age_class', 'area']]
     return df
 
-def area_by_age_class_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def area_by_age_class_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """NAI area by status in wide format for all countries in the given scenario combination.
 
     >>> from eu_cbm_hat.post_processor.area import area_by_age_class_all_countries
@@ -644,7 +671,8 @@ def area_by_age_class_all_countries(combo_name: str, groupby: Union[List[str], s
 
     """
     df_all = apply_to_all_countries(
-        area_by_age_class_one_country, combo_name=combo_name, groupby=groupby
+        area_by_age_class_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -698,7 +726,9 @@ def nai_one_country(combo_name: str, iso2_code: str, groupby: Union[List[str], s
     return df
 
 
-def nai_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def nai_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """NAI area by status in wide format for all countries in the given scenario combination.
 
     >>> from eu_cbm_hat.post_processor.area import nai_all_countries
@@ -706,7 +736,8 @@ def nai_all_countries(combo_name: str, groupby: Union[List[str], str]):
 
     """
     df_all = apply_to_all_countries(
-        nai_one_country, combo_name=combo_name, groupby=groupby
+        nai_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -725,7 +756,9 @@ def nai_con_broad_one_country(combo_name: str, iso2_code: str, groupby: Union[Li
     df = place_combo_name_and_country_first(df, runner)
     return df
 
-def nai_con_broad_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def nai_con_broad_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """NAI area by status in wide format for all countries in the given scenario combination.
 
     >>> from eu_cbm_hat.post_processor.area import nai_all_countries
@@ -733,7 +766,8 @@ def nai_con_broad_all_countries(combo_name: str, groupby: Union[List[str], str])
 
     """
     df_all = apply_to_all_countries(
-        nai_con_broad_one_country, combo_name=combo_name, groupby=groupby
+        nai_con_broad_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     cols_to_keep = ['combo_name', 'country', 'year', 'status', 'con_broad',
        'area', 'nai_merch', 'gai_merch','nai_agb', 'gai_agb', 'nai_merch_ha', 'gai_merch_ha', 'nai_agb_ha','gai_agb_ha']
@@ -773,7 +807,9 @@ def weighted_nai_con_broad_one_country(combo_name: str, iso2_code: str, groupby:
     return final_df
 
 
-def weighted_nai_con_broad_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def weighted_nai_con_broad_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """NAI area by status in wide format for all countries in the given scenario combination.
 
     >>> from eu_cbm_hat.post_processor.area import nai_all_countries
@@ -781,11 +817,14 @@ def weighted_nai_con_broad_all_countries(combo_name: str, groupby: Union[List[st
 
     """
     df_all = apply_to_all_countries(
-        weighted_nai_con_broad_one_country, combo_name=combo_name, groupby=groupby
+        weighted_nai_con_broad_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
-def area_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def area_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """Harvest area by status in wide format for all countries in the given scenario combination.
 
     >>> from eu_cbm_hat.post_processor.area import area_all_countries
@@ -793,7 +832,8 @@ def area_all_countries(combo_name: str, groupby: Union[List[str], str]):
 
     """
     df_all = apply_to_all_countries(
-        area_one_country, combo_name=combo_name, groupby=groupby
+        area_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -834,7 +874,9 @@ def harvest_exp_prov_one_country(
     return df
 
 
-def harvest_exp_prov_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def harvest_exp_prov_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """Information on both harvest expected and provided for all countries in
     the combo_name.
 
@@ -847,9 +889,14 @@ def harvest_exp_prov_all_countries(combo_name: str, groupby: Union[List[str], st
         >>> harvest_exp_prov_all_countries("reference", "year")
         >>> harvest_exp_prov_all_countries("reference", ["year", "forest_type", "disturbance_type"])
 
+    Process 4 countries at a time:
+
+        >>> harvest_exp_prov_all_countries("reference", "year", num_cpus=4)
+
     """
     df_all = apply_to_all_countries(
-        harvest_exp_prov_one_country, combo_name=combo_name, groupby=groupby
+        harvest_exp_prov_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -874,7 +921,9 @@ def volume_stock_one_country(
     df = place_combo_name_and_country_first(df, runner)
     return df
 
-def volume_stock_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def volume_stock_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """Information on both harvest expected and provided for all countries in
     the combo_name.
     Example use:
@@ -885,7 +934,8 @@ def volume_stock_all_countries(combo_name: str, groupby: Union[List[str], str]):
 
     """
     df_all = apply_to_all_countries(
-        volume_stock_one_country, combo_name=combo_name, groupby=groupby
+        volume_stock_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -935,12 +985,12 @@ def soc_one_country(combo_name: str, iso2_code: str, groupby: Union[List[str], s
         hardwood_merch_tc=("hardwood_merch", "sum"),
         medium_tc=("medium_soil", "sum"),
         # new ones
-        above_ground_very_fast_soil_tc=("above_ground_very_fast_soil", sum),
-        below_ground_very_fast_soil_tc=("below_ground_very_fast_soil", sum),
-        above_ground_fast_soil_tc=("above_ground_fast_soil", sum),
-        below_ground_fast_soil_tc=("below_ground_fast_soil", sum),
-        above_ground_slow_soil_tc=("above_ground_slow_soil", sum),
-        below_ground_slow_soil_tc=("below_ground_slow_soil", sum),
+        above_ground_very_fast_soil_tc=("above_ground_very_fast_soil", "sum"),
+        below_ground_very_fast_soil_tc=("below_ground_very_fast_soil", "sum"),
+        above_ground_fast_soil_tc=("above_ground_fast_soil", "sum"),
+        below_ground_fast_soil_tc=("below_ground_fast_soil", "sum"),
+        above_ground_slow_soil_tc=("above_ground_slow_soil", "sum"),
+        below_ground_slow_soil_tc=("below_ground_slow_soil", "sum"),
         area=("area", "sum"),
     )
     df_agg.reset_index(inplace=True)
@@ -969,10 +1019,13 @@ def soc_one_country(combo_name: str, iso2_code: str, groupby: Union[List[str], s
     return df_agg[cols]
 
 
-def soc_all_countries(combo_name: str, groupby: Union[List[str], str]):
+def soc_all_countries(
+    combo_name: str, groupby: Union[List[str], str], num_cpus: int = None
+):
     """Harvest area by status in wide format for all countries in the given scenario combination."""
     df_all = apply_to_all_countries(
-        soc_one_country, combo_name=combo_name, groupby=groupby
+        soc_one_country, combo_name=combo_name, groupby=groupby,
+        num_cpus=num_cpus,
     )
     return df_all
 
@@ -151,14 +151,19 @@ class Area:
         
         return df
 
+    @cached_property
+    def area_columns(self):
+        """Names of the area columns in the df table, computed once and reused
+        by the aggregation methods"""
+        return self.df.columns[self.df.columns.str.contains("area")].to_list()
+
     @cached_property
     def df_agg_by_classifiers_age(self):
         """Area t at the classifier level and by age classes"""
 
         #####
         index = self.parent.classifiers_list + ["year", "age", "age_class"]
-        area_columns = self.df.columns[self.df.columns.str.contains("area")].to_list()
-        df_agg = self.df.groupby(index)[area_columns].agg("sum").reset_index()
+        df_agg = self.df.groupby(index)[self.area_columns].agg("sum").reset_index()
         return df_agg
 
     def df_agg(self, groupby: Union[List[str], str] = None):
@@ -168,8 +173,7 @@ class Area:
         if "year" not in groupby:
             raise ValueError("Year has to be in the grouping variables")
         # Aggregate by the given groupby variables
-        area_columns = self.df.columns[self.df.columns.str.contains("area")].to_list()
-        df_agg = self.df.groupby(groupby)[area_columns].agg("sum").reset_index()
+        df_agg = self.df.groupby(groupby)[self.area_columns].agg("sum").reset_index()
         # Index to compute the area at t-1
         time_columns = ["identifier", "year", "timestep"]
         index = [col for col in groupby if col not in time_columns]
@@ -5,11 +5,157 @@ from functools import cached_property
 import numpy as np
 import pandas
 import yaml
+from eu_cbm_hat import CARBON_FRACTION_OF_BIOMASS
 from eu_cbm_hat.info.harvest import combined
 from eu_cbm_hat.post_processor.convert import ton_carbon_to_m3_ub
 from eu_cbm_hat.post_processor.convert import ton_carbon_to_m3_ob
 
 
+# Silvicultural practice of each disturbance type, as (disturbance_type,
+# silv_practice) pairs. Some disturbance types have several descriptions that
+# belong to different practices, for example 40, 41, 401, 411 and 4141. All
+# pairs are kept so that DIST_SILV_SETS lists every practice of a disturbance
+# type.
+DIST_SILV_PAIRS = [
+    (1, 'thinnings'),  # generic 5%
+    (1, 'thinnings'),  # generic 5% (calibration)
+    (2, 'salvage'),  # Wildfire
+    (3, 'final_cut'),  # Clearcut harvesting without salvage
+    (7, 'salvage'),  # Deforestation
+    (8, 'NA'),  # Afforestation
+    (10, 'thinnings'),  # 10% commercial thinning
+    (11, 'thinnings'),  # generic 10%
+    (12, 'thinnings'),  # 10% commercial thinning
+    (12, 'thinnings'),  # 15% commercial thinning
+    (13, 'thinnings'),  # generic 15%
+    (13, 'thinnings'),  # generic 20%
+    (14, 'thinnings'),  # 15% commercial thinning
+    (14, 'thinnings'),  # 20% commercial thinning
+    (15, 'thinnings'),  # generic 20%
+    (15, 'thinnings'),  # generic 25%
+    (16, 'thinnings'),  # 20% commercial thinning
+    (16, 'thinnings'),  # 25% commercial thinning
+    (16, 'thinnings'),  # 30% commercial thinning
+    (17, 'thinnings'),  # generic 25%
+    (17, 'thinnings'),  # generic 30%
+    (18, 'thinnings'),  # 25% commercial thinning
+    (18, 'thinnings'),  # 30% commercial thinning
+    (18, 'thinnings'),  # 35% commercial thinning
+    (18, 'thinnings'),  # 35% Commercial thinning
+    (19, 'thinnings'),  # 35% commercial thinning
+    (21, 'final_cut'),  # 97% clearcut
+    (22, 'final_cut'),  # Clearcut harvesting with salvage
+    (24, 'final_cut'),  # Clearcut with slash-burn
+    (40, 'thinnings'),  # generic 15% (calibration)
+    (40, 'final_cut'),  # Stand Replacing Natural Succession
+    (40, 'final_cut'),  # Stand Replacing Natural Succession (calibration)
+    (41, 'salvage'),  # generic 40% mortality (calibration)
+    (41, 'final_cut'),  # generic 90% mortality
+    (41, 'final_cut'),  # generic 90% mortality (calibration)
+    (41, 'salvage'),  # Insects with salvage logging
+    (41, 'salvage'),  # Insects with salvage logging (calibration)
+    (42, 'salvage'),  # generic 90% mortality (calibration)
+    (42, 'salvage'),  # Insects with salvage logging (calibration)
+    (42, 'salvage'),  # Insects with salvage logging (nd_nsr), Matrix ID 25
+    (43, 'salvage'),  # generic 60% mortality (calibration)
+    (43, 'salvage'),  # Salvage logging after insects (calibration)
+    (45, 'salvage'),  # generic 90% mortality (calibration)
+    (45, 'salvage'),  # Salvage logging after insects (calibration)
+    (50, 'salvage'),  # Fire with salvage logging
+    (50, 'salvage'),  # Fire with salvage logging (calibration)
+    (50, 'salvage'),  # generic 50% mortality (calibration)
+    (51, 'salvage'),  # Fire with salvage logging (calibration)
+    (115, 'thinnings'),  # 15% commercial thinning
+    (120, 'thinnings'),  # generic 40% mortality
+    (125, 'final_cut'),  # generic 70%
+    (130, 'final_cut'),  # generic 85%
+    (400, 'final_cut'),  # Stand Replacing Natural Succession (projection)
+    (401, 'thinnings'),  # generic 15% (projection)
+    (401, 'final_cut'),  # generic 90% mortality (projection)
+    (401, 'final_cut'),  # Stand Replacing Natural Succession (projection)
+    (402, 'salvage'),  # Insects with salvage logging (projection)
+    (411, 'thinnings'),  # generic 40% mortality (projection)
+    (411, 'salvage'),  # generic 90% mortality (projection)
+    (411, 'salvage'),  # Insects with salvage logging (projection)
+    (420, 'salvage'),  # Insects with salvage logging (projection)
+    (421, 'salvage'),  # generic 90% mortality (projection)
+    (421, 'salvage'),  # Insects with salvage logging (projection)
+    (431, 'salvage'),  # generic 60% mortality (projection)
+    (431, 'salvage'),  # Salvage logging after insects (projection)
+    (451, 'salvage'),  # generic 90% mortality (projection)
+    (451, 'salvage'),  # Salvage logging after insects (projection)
+    (491, 'final_cut'),  # Stand Replacing Natural Succession (projection)
+    (500, 'salvage'),  # Fire with salvage logging (projection)
+    (501, 'salvage'),  # Fire with salvage logging (projection)
+    (501, 'salvage'),  # generic 50% mortality (projection)
+    (515, 'thinnings'),  # Post_conversion_LA_15%_commercial_thinning
+    (516, 'final_cut'),  # Conversion_to_u_u_con
+    (517, 'final_cut'),  # Conversion_to_u_u_broad
+    (518, 'final_cut'),  # Conversion_to_u_u_con
+    (535, 'thinnings'),  # Step_1_conversion_LA_35%_commercial_thinning
+    (550, 'thinnings'),  # Step_2_conversion_LA_50%_commercial_thinning
+    (615, 'thinnings'),  # Post_conversion_ST_15%_commercial_thinning
+    (625, 'thinnings'),  # Step_1_conversion_ST_25%_commercial_thinning
+    (640, 'thinnings'),  # Step_2_conversion_ST_40%_commercial_thinning
+    (700, 'final_cut'),  # Conversion_of_coppice_to_high_stands
+    (701, 'final_cut'),  # Conversion_of_old_stands_to_coppice
+    (1010, 'thinnings'),  # 10% commercial thinning hist
+    (1111, 'thinnings'),  # generic 10% hist
+    (1212, 'thinnings'),  # 10% commercial thinning hist
+    (1212, 'thinnings'),  # 15% commercial thinning hist
+    (1313, 'thinnings'),  # generic 15% hist
+    (1313, 'thinnings'),  # generic 20% hist
+    (1414, 'thinnings'),  # 15% commercial thinning hist
+    (1414, 'thinnings'),  # 20% commercial thinning hist
+    (1515, 'thinnings'),  # generic 20% hist
+    (1515, 'thinnings'),  # generic 25% hist
+    (1616, 'thinnings'),  # 20% commercial thinning hist
+    (1616, 'thinnings'),  # 25% commercial thinning hist
+    (1616, 'thinnings'),  # 30% commercial thinning hist
+    (1717, 'thinnings'),  # generic 25% hist
+    (1717, 'thinnings'),  # generic 30% hist
+    (1818, 'thinnings'),  # 25% commercial thinning hist
+    (1818, 'thinnings'),  # 30% commercial thinning hist
+    (1818, 'thinnings'),  # 35% commercial thinning hist
+    (1818, 'thinnings'),  # 35% Commercial thinning hist
+    (2121, 'final_cut'),  # 97% clearcut hist
+    (2222, 'final_cut'),  # Clearcut harvesting with salvage hist
+    (2424, 'final_cut'),  # Clearcut with slash-burn hist
+    (4040, 'final_cut'),  # Stand Replacing Natural Succession (calibration) hist
+    (4141, 'thinnings'),  # generic 40% mortality (calibration) hist
+    (4141, 'salvage'),  # generic 90% mortality (calibration) hist
+    (4141, 'salvage'),  # generic 90% mortality hist
+    (4141, 'salvage'),  # Insects with salvage logging (calibration) hist
+    (4242, 'salvage'),  # generic 90% mortality (calibration) hist
+    (4242, 'salvage'),  # Insects with salvage logging (calibration) hist
+    (4343, 'salvage'),  # generic 60% mortality (calibration) hist
+    (4343, 'salvage'),  # Salvage logging after insects (calibration) hist
+    (4545, 'salvage'),  # generic 90% mortality (calibration) hist
+    (4545, 'salvage'),  # Salvage logging after insects (calibration) hist
+    (115115, 'thinnings'),  # 15% commercial thinning hist
+    (120120, 'thinnings'),  # generic 40% mortality hist
+    (125125, 'salvage'),  # generic 70% hist
+    (130130, 'salvage'),  # generic 85% hist
+]
+
+# All practices of each disturbance type
+DIST_SILV_SETS = {}
+for _code, _practice in DIST_SILV_PAIRS:
+    DIST_SILV_SETS.setdefault(_code, set()).add(_practice)
+del _code, _practice
+DIST_SILV_SETS = {code: frozenset(practices) for code, practices in DIST_SILV_SETS.items()}
+
+# One practice per disturbance type. When a disturbance type has several
+# practices, the first one in this order is used: a disturbance that includes
+# salvage logging is reported as salvage, otherwise a stand replacing
+# disturbance is reported as a final cut rather than a thinning.
+SILV_PRACTICE_PRIORITY = ['salvage', 'final_cut', 'thinnings', 'NA']
+DIST_SILV_CORRESP = {
+    code: min(practices, key=SILV_PRACTICE_PRIORITY.index)
+    for code, practices in DIST_SILV_SETS.items()
+}
+
+
 class Harvest:
     """Compute the harvest expected and provided
 
@@ -61,6 +207,15 @@ class Harvest:
     def __repr__(self):
         return '%s object code "%s"' % (self.__class__, self.runner.short_name)
 
+    @cached_property
+    def cols_to_product(self) -> List[str]:
+        """Flux columns going to products, one for each source pool
+
+        Selected once from the column names. The "to_product" total column
+        added by the provided methods does not match.
+        """
+        return [col for col in self.fluxes.columns if col.endswith("_to_product")]
+
     @cached_property
     def demand(self) -> pandas.DataFrame:
         """Get demand from the economic model using eu_cbm_hat/info/harvest.py
@@ -168,25 +323,19 @@ class Harvest:
         """Harvest provided in one country"""
         df = self.fluxes
         
-        # Sum all columns that have a flux to products
-        cols_to_product = df.columns[df.columns.str.contains("to_product")]
-        df["to_product"] = df[cols_to_product].sum(axis=1)
+        # Sum all columns that have a flux to products, as an array so that
+        # the parent's fluxes table is not modified. Missing values count as
+        # zero as in sum(axis=1).
+        to_product = np.nansum(df[self.cols_to_product].to_numpy(), axis=1)
         # Keep only rows with a flux to product
-        selector = df.to_product > 0
-        df = df[selector]
+        selector = to_product > 0
+        df = df[selector].assign(to_product=to_product[selector])
         # Check we only have 1 year since last disturbance
-        time_since_last = df["time_since_last_disturbance"].unique()
-        if not time_since_last == 1:
+        time_since_last = df["time_since_last_disturbance"].to_numpy()
+        if time_since_last.size and (time_since_last.min() != 1 or time_since_last.max() != 1):
             msg = "Time since last disturbance should be one"
-            msg += f"it is {time_since_last}"
+            msg += f"it is {np.unique(time_since_last)}"
             raise ValueError(msg)
-        # Add wood density information by forest type
-        df = df.merge(self.parent.wood_density_bark_frac, on="forest_type")
-
-        # Convert tons of carbon to volume under bark
-        df["harvest_prov_ub"] = ton_carbon_to_m3_ub(df, "to_product")
-        df["harvest_prov_ob"] = ton_carbon_to_m3_ob(df, "to_product")
-       
         # #################
         # add irw fractions from input file to convert to IRW and FW
         df_irw = self.parent.irw_frac
@@ -208,6 +357,17 @@ class Harvest:
                                     "mgmt_type","mgmt_strategy",
                                     "disturbance_type", "con_broad", 
                                     "site_index", "growth_period"], how='inner')
+
+        # Add wood density information by forest type, as a lookup on the
+        # small forest type table rather than a merge. This comes after the
+        # inner merge above, so only rows with irw fractions are converted.
+        # Inner join, forest types without a wood density are left out.
+        df = df.join(self.parent.wood_density_bark_frac.set_index("forest_type"),
+                     on="forest_type", how="inner")
+
+        # Convert tons of carbon to volume under bark
+        df["harvest_prov_ub"] = ton_carbon_to_m3_ub(df, "to_product")
+        df["harvest_prov_ob"] = ton_carbon_to_m3_ob(df, "to_product")
         
         #df.to_csv('harv_check_after.csv')
         #convert roundwood output to IRW and FW
@@ -240,15 +400,20 @@ class Harvest:
         df["fw_to_product"] = (df["fw_to_product_soft"] + df["fw_to_product_hard"] )
             
                               
-        # Convert tons of carbon to volume under bark
-        df["irw_harvest_prov_ub_con"] = ton_carbon_to_m3_ub(df, "irw_to_product_soft")
-        df["irw_harvest_prov_ub_broad"] = ton_carbon_to_m3_ub(df, "irw_to_product_hard")
-        df["irw_harvest_prov_ob_con"] = ton_carbon_to_m3_ob(df, "irw_to_product_soft")
-        df["irw_harvest_prov_ob_broad"] = ton_carbon_to_m3_ob(df, "irw_to_product_hard")
-        df["fw_harvest_prov_ub_con"] = ton_carbon_to_m3_ub(df, "fw_to_product_soft")
-        df["fw_harvest_prov_ub_broad"] = ton_carbon_to_m3_ub(df, "fw_to_product_hard")
-        df["fw_harvest_prov_ob_con"] = ton_carbon_to_m3_ob(df, "fw_to_product_soft")
-        df["fw_harvest_prov_ob_broad"] = ton_carbon_to_m3_ob(df, "fw_to_product_hard")
+        # Convert tons of carbon to volume under bark and over bark, as in
+        # ton_carbon_to_m3_ub and ton_carbon_to_m3_ob, for the 4 irw and fw
+        # columns at once
+        carbon = df[["irw_to_product_soft", "irw_to_product_hard",
+                     "fw_to_product_soft", "fw_to_product_hard"]].to_numpy()
+        divisor = (CARBON_FRACTION_OF_BIOMASS * df["wood_density"].to_numpy())[:, None]
+        under_bark = carbon * (1 - df["bark_frac"].to_numpy())[:, None] / divisor
+        over_bark = carbon / divisor
+        df[["irw_harvest_prov_ub_con", "irw_harvest_prov_ub_broad",
+            "irw_harvest_prov_ob_con", "irw_harvest_prov_ob_broad",
+            "fw_harvest_prov_ub_con", "fw_harvest_prov_ub_broad",
+            "fw_harvest_prov_ob_con", "fw_harvest_prov_ob_broad"]] = np.hstack(
+            [under_bark[:, :2], over_bark[:, :2], under_bark[:, 2:], over_bark[:, 2:]]
+        )
 
 
         df["irw_harvest_prov_ub"] =  df["irw_harvest_prov_ub_con"] + df["irw_harvest_prov_ub_broad"]
@@ -256,10 +421,16 @@ class Harvest:
         df["fw_harvest_prov_ub"] = df["fw_harvest_prov_ub_con"] + df["fw_harvest_prov_ub_broad"]
         df["fw_harvest_prov_ob"] = df["fw_harvest_prov_ob_con"] + df["fw_harvest_prov_ob_broad"]
 
-        # Area information
+        # Area information, looked up on the identifier and timestep of each
+        # row since there is one pools row for each of them
         index = ["identifier", "timestep"]
-        area = self.pools[index + ["area"]]
-        df = df.merge(area, on=index)
+        area = self.parent.area_by_identifier_timestep
+        df["area"] = area.reindex(pandas.MultiIndex.from_frame(df[index])).to_numpy()
+        missing = df["area"].isna()
+        if missing.any():
+            msg = "No area in the pools for these identifier and timestep:\n"
+            msg += f"{df.loc[missing, index].drop_duplicates()}"
+            raise ValueError(msg)
         #print(self.provided)
         #df.to_csv('harvest_check.csv', mode='a', index=False, header=True)
         return df
@@ -270,156 +441,36 @@ class Harvest:
         """Harvest provided in one country on disturbance types"""
         df = self.fluxes
         
-        # Sum all columns that have a flux to products
-        cols_to_product = df.columns[df.columns.str.contains("to_product")]
-        df["to_product"] = df[cols_to_product].sum(axis=1)
+        # Sum all columns that have a flux to products, as an array so that
+        # the parent's fluxes table is not modified. Missing values count as
+        # zero as in sum(axis=1).
+        to_product = np.nansum(df[self.cols_to_product].to_numpy(), axis=1)
         # Keep only rows with a flux to product
-        selector = df.to_product > 0
-        df = df[selector]
+        selector = to_product > 0
+        # Only the columns used for the shares, the fluxes table is wide
+        cols = ["year", "con_broad", "forest_type", "disturbance_type",
+                "time_since_last_disturbance"]
+        df = df.loc[selector, cols].assign(to_product=to_product[selector])
         # Check we only have 1 year since last disturbance
-        time_since_last = df["time_since_last_disturbance"].unique()
-        if not time_since_last == 1:
+        time_since_last = df["time_since_last_disturbance"].to_numpy()
+        if time_since_last.size and (time_since_last.min() != 1 or time_since_last.max() != 1):
             msg = "Time since last disturbance should be one"
-            msg += f"it is {time_since_last}"
+            msg += f"it is {np.unique(time_since_last)}"
             raise ValueError(msg)
-        # Add wood density information by forest type
-        df = df.merge(self.parent.wood_density_bark_frac, on="forest_type")
+        # Add wood density information by forest type, as a lookup on the
+        # small forest type table rather than a merge. Inner join, forest
+        # types without a wood density are excluded from the shares.
+        df = df.join(self.parent.wood_density_bark_frac.set_index("forest_type"),
+                     on="forest_type", how="inner")
         #df.to_csv('harvest_check.csv', mode='a', index=False, header=True)
         
-        # Convert tons of carbon to volume under bark
+        # Convert tons of carbon to volume under bark, the shares are computed
+        # on volumes under bark only
         df["harvest_prov_ub"] = ton_carbon_to_m3_ub(df, "to_product")
-        df["harvest_prov_ob"] = ton_carbon_to_m3_ob(df, "to_product")
 
-        dist_silv_corresp = { 
-                1 :'thinnings',#generic 5%
-                1 :'thinnings',#generic 5% (calibration)
-                2 :'salvage',#Wildfire
-                3 :'final_cut',#Clearcut harvesting without salvage
-                7 :'salvage',#Deforestation
-                8 :'NA',#Afforestation
-                10 :'thinnings',#10% commercial thinning
-                11 :'thinnings',#generic 10%
-                12 :'thinnings',#10% commercial thinning
-                12 :'thinnings',#15% commercial thinning
-                13 :'thinnings',#generic 15%
-                13 :'thinnings',#generic 20%
-                14 :'thinnings',#15% commercial thinning
-                14 :'thinnings',#20% commercial thinning
-                15 :'thinnings',#generic 20%
-                15 :'thinnings',#generic 25%
-                16 :'thinnings',#20% commercial thinning
-                16 :'thinnings',#25% commercial thinning
-                16 :'thinnings',#30% commercial thinning
-                17 :'thinnings',#generic 25%
-                17 :'thinnings',#generic 30%
-                18 :'thinnings',#25% commercial thinning
-                18 :'thinnings',#30% commercial thinning
-                18 :'thinnings',#35% commercial thinning
-                18 :'thinnings',#35% Commercial thinning
-                19 :'thinnings',#35% commercial thinning
-                21 :'final_cut',#97% clearcut
-                22 :'final_cut',#Clearcut harvesting with salvage
-                24 :'final_cut',#Clearcut with slash-burn
-                40 :'thinnings',#generic 15% (calibration)
-                40 :'final_cut',#Stand Replacing Natural Succession
-                40 :'final_cut',#Stand Replacing Natural Succession (calibration)
-                41 :'salvage',#generic 40% mortality (calibration)
-                41 :'final_cut',#generic 90% mortality
-                41 :'final_cut',#generic 90% mortality (calibration)
-                41 :'salvage',#Insects with salvage logging
-                41 :'salvage',#Insects with salvage logging (calibration)
-                42 :'salvage',#generic 90% mortality (calibration)
-                42 :'salvage',#Insects with salvage logging (calibration)
-                42 :'salvage',#Insects with salvage logging (nd_nsr), Matrix ID 25
-                43 :'salvage',#generic 60% mortality (calibration)
-                43 :'salvage',#Salvage logging after insects (calibration)
-                45 :'salvage',#generic 90% mortality (calibration)
-                45 :'salvage',#Salvage logging after insects (calibration)
-                50 :'salvage',#Fire with salvage logging
-                50 :'salvage',#Fire with salvage logging (calibration)
-                50 :'salvage',#generic 50% mortality (calibration)
-                51 :'salvage',#Fire with salvage logging (calibration)
-                115 :'thinnings',#15% commercial thinning
-                120 :'thinnings',#generic 40% mortality
-                125 :'final_cut',#generic 70%
-                130 :'final_cut',#generic 85%
-                400 :'final_cut',#Stand Replacing Natural Succession (projection)
-                401 :'thinnings',#generic 15% (projection)
-                401 :'final_cut',#generic 90% mortality (projection)
-                401 :'final_cut',#Stand Replacing Natural Succession (projection)
-                402 :'salvage',#Insects with salvage logging (projection)
-                411 :'thinnings',#generic 40% mortality (projection)
-                411 :'salvage',#generic 90% mortality (projection)
-                411 :'salvage',#Insects with salvage logging (projection)
-                420 :'salvage',#Insects with salvage logging (projection)
-                421 :'salvage',#generic 90% mortality (projection)
-                421 :'salvage',#Insects with salvage logging (projection)
-                431 :'salvage',#generic 60% mortality (projection)
-                431 :'salvage',#Salvage logging after insects (projection)
-                451 :'salvage',#generic 90% mortality (projection)
-                451 :'salvage',#Salvage logging after insects (projection)
-                491 :'final_cut',#Stand Replacing Natural Succession (projection)
-                500 :'salvage',#Fire with salvage logging (projection)
-                501 :'salvage',#Fire with salvage logging (projection)
-                501 :'salvage',#generic 50% mortality (projection)
-                515 :'thinnings',#Post_conversion_LA_15%_commercial_thinning
-                516 :'final_cut',#Conversion_to_u_u_con
-                517 :'final_cut',#Conversion_to_u_u_broad
-                518 :'final_cut',#Conversion_to_u_u_con
-                535 :'thinnings',#Step_1_conversion_LA_35%_commercial_thinning
-                550 :'thinnings',#Step_2_conversion_LA_50%_commercial_thinning
-                615 :'thinnings',#Post_conversion_ST_15%_commercial_thinning
-                625 :'thinnings',#Step_1_conversion_ST_25%_commercial_thinning
-                640 :'thinnings',#Step_2_conversion_ST_40%_commercial_thinning
-                700 :'final_cut',#Conversion_of_coppice_to_high_stands
-                701 :'final_cut',#Conversion_of_old_stands_to_coppice
-                1010 :'thinnings',#10% commercial thinning hist
-                1111 :'thinnings',#generic 10% hist
-                1212 :'thinnings',#10% commercial thinning hist
-                1212 :'thinnings',#15% commercial thinning hist
-                1313 :'thinnings',#generic 15% hist
-                1313 :'thinnings',#generic 20% hist
-                1414 :'thinnings',#15% commercial thinning hist
-                1414 :'thinnings',#20% commercial thinning hist
-                1515 :'thinnings',#generic 20% hist
-                1515 :'thinnings',#generic 25% hist
-                1616 :'thinnings',#20% commercial thinning hist
-                1616 :'thinnings',#25% commercial thinning hist
-                1616 :'thinnings',#30% commercial thinning hist
-                1717 :'thinnings',#generic 25% hist
-                1717 :'thinnings',#generic 30% hist
-                1818 :'thinnings',#25% commercial thinning hist
-                1818 :'thinnings',#30% commercial thinning hist
-                1818 :'thinnings',#35% commercial thinning hist
-                1818 :'thinnings',#35% Commercial thinning hist
-                2121 :'final_cut',#97% clearcut hist
-                2222 :'final_cut',#Clearcut harvesting with salvage hist
-                2424 :'final_cut',#Clearcut with slash-burn hist
-                4040 :'final_cut',#Stand Replacing Natural Succession (calibration) hist
-                4141 :'thinnings',#generic 40% mortality (calibration) hist
-                4141 :'salvage',#generic 90% mortality (calibration) hist
-                4141 :'salvage',#generic 90% mortality hist
-                4141 :'salvage',#Insects with salvage logging (calibration) hist
-                4242 :'salvage',#generic 90% mortality (calibration) hist
-                4242 :'salvage',#Insects with salvage logging (calibration) hist
-                4343 :'salvage',#generic 60% mortality (calibration) hist
-                4343 :'salvage',#Salvage logging after insects (calibration) hist
-                4545 :'salvage',#generic 90% mortality (calibration) hist
-                4545 :'salvage',#Salvage logging after insects (calibration) hist
-                115115 :'thinnings',#15% commercial thinning hist
-                120120 :'thinnings',#generic 40% mortality hist
-                125125 :'salvage',#generic 70% hist
-                130130 :'salvage',#generic 85% hist
-                }
-
-        # Add a new column to the DataFrame
-        df['silv_practice'] = None
-                        
-        # Match the values in df with the keys in dist_silv_corresp
-        for i in range(len(df)):
-            disturbance_type = df.loc[i, 'disturbance_type']
-            if disturbance_type in dist_silv_corresp:
-                df.loc[i, 'silv_practice'] = dist_silv_corresp[disturbance_type]
+        # Match the values in df with the keys in DIST_SILV_CORRESP
+        # disturbance types not in the dict are missing and dropped by the groupby below
+        df['silv_practice'] = df['disturbance_type'].map(DIST_SILV_CORRESP)
         #df.to_csv('overall.csv', mode='w', index=False, header=True)
         
         summed_df = df.groupby(['year', 'con_broad', 'silv_practice'])['harvest_prov_ub'].sum()
@@ -7,7 +7,7 @@
 from typing import Union, List
 from functools import cached_property
 from eu_cbm_hat import eu_cbm_data_pathlib
-from eu_cbm_hat.post_processor.hwp_input import HWPInput
+from eu_cbm_hat.post_processor.hwp_input import HWPInput, YEAR_COL_RE
 import numpy as np
 import pandas as pd
 
@@ -51,16 +51,18 @@ class HWP(object):
 
         # Filter the columns that start with 'Y' and do not end with a letter
         keep_columns = ['Area Code', 'Area', 'Item Code','Item_orig', 'Item', 'Element Code', 'Element_orig', 'Unit']
-        fao_stat = df.loc[:, keep_columns + df.columns[(df.columns.str.startswith('Y')) &
-                                                       ~(df.columns.str.endswith(('F', 'N')))].tolist()]
+        year_columns = [col for col in df.columns if YEAR_COL_RE.match(col)]
+        fao_stat = df.loc[:, keep_columns + year_columns]
 
         # Rename columns to remove 'Y' prefix for the year
-        new_columns = {col: col[1:] if col.startswith('Y') else col for col in df.columns}
+        new_columns = {col: col[1:] for col in year_columns}
         fao_stat = fao_stat.rename(columns=new_columns)
 
         # reorganize table on long format
         fao_stat = fao_stat.melt(id_vars=['Area Code', 'Area', 'Item Code', 'Item_orig', 'Item','Element Code', 'Element_orig',
                                             'Unit'], var_name='year', value_name='Value')
+        # parse the year labels once, right after the reshape
+        fao_stat['year'] = fao_stat['year'].astype(int)
         # add new labels on a new column for harmonization 
 
         shorts_mapping = {
@@ -74,7 +76,7 @@ class HWP(object):
 
         #aggregate on labels
         df_exp = (fao_stat
-                    .groupby(['area', 'Element', 'year', 'Item'])
+                    .groupby(['area', 'Element', 'year', 'Item'], observed=True)
                     .agg(value = ('Value', 'sum'))
                     .reset_index()
                          )
@@ -82,17 +84,17 @@ class HWP(object):
         df_exp ['type'] = df_exp ['Item'] .astype(str)+"_"+df_exp ['Element'].astype(str)
 
         # convert long to wide format
-        df_exp= df_exp.pivot(index=['area', 'year'], columns=['type'], values=['value'])
-        df_exp=df_exp.droplevel(None, axis=1).reset_index()
+        df_exp= df_exp.pivot(index=['area', 'year'], columns='type', values='value').reset_index()
 
         # replacing NA to 0, so possible to make aritmetic operations
         df_exp=df_exp.fillna(0)
 
         # add con and broad aggregates, for information purpose only as split on con and broad is mantained
         # reduce to IRW
-        df_exp['irw_prod'] = df_exp['irw_broad_prod'] + df_exp['irw_con_prod']
-        df_exp['irw_exp'] = df_exp['irw_broad_exp'] + df_exp['irw_con_exp']
-        df_exp['irw_imp'] = df_exp['irw_broad_imp'] + df_exp['irw_con_imp']
+        # the three flows are added in one pass over a (n_rows, 3) block
+        flows = ['prod', 'exp', 'imp']
+        df_exp[['irw_' + x for x in flows]] = (df_exp[['irw_broad_' + x for x in flows]].to_numpy() +
+                                               df_exp[['irw_con_' + x for x in flows]].to_numpy())
 
         #df_exp.to_csv('C:/CBM/exp.csv')
         # estimate the fractions of domestic in the country's feedstock: IRW, WP, PULP on con and broad
@@ -150,7 +152,6 @@ class HWP(object):
 
         #replacing NA to 0, so possible to make operations
         df_exp['fREC_PAPER'] =df_exp['fREC_PAPER'].fillna(0)
-        df_exp['year'] =df_exp['year'].astype(int)
         return df_exp   
 
 
@@ -182,18 +183,15 @@ def rw_export_correction_factor():
 def crf_semifinished_data():
         """ data 1961-2021 from common\hwp_crf_submission_2023.csv
         input timeseries of quantities of semifinshed products reported under the CRF"""
-        df_crf=crf_stat.set_index(['area', 'year'])
         selector = '_crf'
-        df_crf=df_crf.filter(regex=selector).reset_index()
+        # keep the production columns and remove strings in names
+        prod_columns = {col: col.replace(selector, '') for col in crf_stat.columns
+                        if selector in col and '_prod' in col.replace(selector, '')}
+        df_crf = crf_stat[['area', 'year'] + list(prod_columns)].rename(columns=prod_columns)
         
-        # remove strings in names
-        df_crf.columns=df_crf.columns.str.replace(selector,'')
-        df_crf=df_crf.set_index(['area', 'year'])
-        
-        # remove notation kew from CRF based data
-        df_crf=df_crf.replace (["NO", 'NE', 'NA', 'NA,NE'], 0)
-        df_crf=df_crf.fillna(0).astype(float)
-        df_crf=df_crf.filter(regex='_prod').reset_index()
+        # notation keys from CRF based data are read as NaN, see HWPInput.crf_stat
+        cols = list(prod_columns.values())
+        df_crf[cols] = df_crf[cols].apply(pd.to_numeric, errors="coerce").fillna(0).astype(float)
         df_crf['year'] =df_crf['year'].astype(int)
         return df_crf
 
@@ -229,13 +227,11 @@ def gap_filling_eu_totals():
     df_dp = df_dp[['year', 'area', 'sw_prod', 'wp_prod', 'pp_prod']]
     df_ms = df_dp.rename (columns = {'sw_prod':'sw_prod_ms','wp_prod':'wp_prod_ms','pp_prod':'pp_prod_ms'})
     
-    # Group by Area, Item, and Element
-    grouped = df_ms.groupby(['year', 'area'])
-   
-    complete_groups = grouped.filter(lambda x: 
-                                  not ((x['sw_prod_ms'] == 0).any() or 
-                                       (x['wp_prod_ms'] == 0).any() or
-                                       (x['pp_prod_ms'] == 0).any()))
+    # Exclude the year and area groups where any of the productions is zero
+    prod_cols = ['sw_prod_ms', 'wp_prod_ms', 'pp_prod_ms']
+    has_zero = (df_ms[prod_cols] == 0).any(axis=1)
+    incomplete = has_zero.groupby([df_ms['year'], df_ms['area']]).transform('any')
+    complete_groups = df_ms[~incomplete]
     
     # Group by Area, Item, and Element and sum the amount
     df_eu = complete_groups.groupby(['year'])[['sw_prod_ms','wp_prod_ms','pp_prod_ms']].sum().reset_index()
@@ -248,82 +244,63 @@ def gap_filling_eu_totals():
     df_eu['EU'] = 'EU'
     df_crf_eu = df_eu.merge(df_ms, on = ['year'])
     df_crf_eu = df_crf_eu.sort_values (by = ['year','area'] )
-    df_crf_eu.replace(0, np.nan, inplace=True)
+    # Only the production columns can hold zeros to mark as missing
+    prod_cols = [col for col in df_crf_eu.columns if '_prod_' in col]
+    df_crf_eu[prod_cols] = df_crf_eu[prod_cols].mask(df_crf_eu[prod_cols] == 0)
     #df_crf_eu.to_csv('C:/CBM/interpolated.csv')
     return df_crf_eu
 
 
+# %%
+def backward_fill_with_ratio(values, ratios):
+    """Fill missing values backward, from the last row to the first
+
+    A missing value is the filled value of the next row divided by the ratio
+    of the current row, truncated to an integer. It stays missing when the
+    next row is missing. Non missing values are kept as they are.
+
+    Example:
+
+        >>> backward_fill_with_ratio([np.nan, np.nan, 10.0], [2.0, 2.0, np.nan])
+        array([ 2.,  5., 10.])
+
+    """
+    values = np.asarray(values, dtype=float)
+    ratios = np.asarray(ratios, dtype=float)
+    result = values.copy()
+    # The recurrence truncates at every step so it can't be a cumulative
+    # product, loop on plain floats instead of DataFrame rows
+    for i in range(len(result) - 2, -1, -1):
+        if np.isnan(values[i]) and not np.isnan(result[i + 1]):
+            result[i] = int(result[i + 1] / ratios[i])
+    return result
+
+
 # %%
 def gapfill_hwp_ms_backward(df):
     # Copy the original DataFrame to avoid modifying the original data for 1961-2021
     interpolated_ms = df.copy()
     
-    # Calculate the ratio of irw_eu for each row to the next row
-    interpolated_ms['sw_ratio'] = interpolated_ms['sw_prod_eu'].shift(-1) / interpolated_ms['sw_prod_eu']
-    interpolated_ms['wp_ratio'] = interpolated_ms['wp_prod_eu'].shift(-1) / interpolated_ms['wp_prod_eu']
-    interpolated_ms['pp_ratio'] = interpolated_ms['pp_prod_eu'].shift(-1) / interpolated_ms['pp_prod_eu']
-    
     # Reset the index to ensure consecutive integers
     interpolated_ms.reset_index(drop=True, inplace=True)
     
-    # Reverse the DataFrame to fill missing values in reverse order
-    interpolated_ms = interpolated_ms.iloc[::-1]
-    
-    # Fill missing values in new_irw_ms using the ratio
-    for index, row in interpolated_ms.iterrows():
-        if pd.isnull(row['sw_prod_ms']):
-            next_value = interpolated_ms.at[index + 1, 'new_sw_ms']
-            if not pd.isnull(next_value):
-                interpolated_ms.at[index, 'new_sw_ms'] = int(next_value / row['sw_ratio'])
-            else:
-                interpolated_ms.at[index, 'new_sw_ms'] = next_value  # Keep NaN if next value is NaN
-        else:
-            interpolated_ms.at[index, 'new_sw_ms'] = row['sw_prod_ms']
-       
-    for index, row in interpolated_ms.iterrows():
-        if pd.isnull(row['wp_prod_ms']):
-            next_value = interpolated_ms.at[index + 1, 'new_wp_ms']
-            if not pd.isnull(next_value):
-                interpolated_ms.at[index, 'new_wp_ms'] = int(next_value / row['wp_ratio'])
-            else:
-                interpolated_ms.at[index, 'new_wp_ms'] = next_value  # Keep NaN if next value is NaN
-        else:
-            interpolated_ms.at[index, 'new_wp_ms'] = row['wp_prod_ms']
-            
-    for index, row in interpolated_ms.iterrows():
-        if pd.isnull(row['pp_prod_ms']):
-            next_value = interpolated_ms.at[index + 1, 'new_pp_ms']
-            if not pd.isnull(next_value):
-                interpolated_ms.at[index, 'new_pp_ms'] = int(next_value / row['pp_ratio'])
-            else:
-                interpolated_ms.at[index, 'new_pp_ms'] = next_value  # Keep NaN if next value is NaN
-        else:
-            interpolated_ms.at[index, 'new_pp_ms'] = row['pp_prod_ms']       
-    
-         
-    #for col in ['sw_ratio', 'wp_ratio', 'pp_ratio']:
-    #    for index, row in interpolated_ms.iterrows():
-    #        if pd.isnull(row[col]):
-    #            next_value = interpolated_ms.at[index + 1, f'new_{col[:-6]}_ms']
-    #            if not pd.isnull(next_value):
-    #                interpolated_ms.at[index, f'new_{col[:-6]}_ms'] = int(next_value / row[col])
-    #            else:
-    #                interpolated_ms.at[index, f'new_{col[:-6]}_ms'] = next_value  # Keep NaN if next value is NaN
-    #        else:
-    #            interpolated_ms.at[index, f'new_{col[:-6]}_ms'] = row[col]
-    
-    # Reverse the DataFrame back to the original order
-    interpolated_ms = interpolated_ms.iloc[::-1]
+    # Calculate the ratio of eu production for each row to the next row,
+    # for sawnwood, wood panels and paper at once
+    prefixes = ['sw', 'wp', 'pp']
+    prod_eu = interpolated_ms[[f'{prefix}_prod_eu' for prefix in prefixes]]
+    ratios = (prod_eu.shift(-1) / prod_eu).to_numpy()
+    
+    # Fill missing values in new_*_ms using the ratio, from the last row backward
+    for i, prefix in enumerate(prefixes):
+        interpolated_ms[f'new_{prefix}_ms'] = backward_fill_with_ratio(
+            interpolated_ms[f'{prefix}_prod_ms'], ratios[:, i])
+    
+    # Carbon content of sawnwood, wood panels and paper, broadcast over the 3 columns
     c_sw = 0.225
     c_pw = 0.294
     c_pp = 0.450
-    interpolated_ms['sw_domestic_tc'] = c_sw * interpolated_ms['new_sw_ms']
-    interpolated_ms['wp_domestic_tc'] = c_pw * interpolated_ms['new_wp_ms']
-    interpolated_ms['pp_domestic_tc'] = c_pp * interpolated_ms['new_pp_ms']
-    
-    # Drop the temporary 'ratio' column as it's no longer needed
-    columns_to_drop = ['sw_ratio', 'wp_ratio', 'pp_ratio']
-    interpolated_ms.drop(columns=columns_to_drop, inplace=True)
+    new_ms = interpolated_ms[[f'new_{prefix}_ms' for prefix in prefixes]].to_numpy()
+    interpolated_ms[[f'{prefix}_domestic_tc' for prefix in prefixes]] = new_ms * np.array([c_sw, c_pw, c_pp])
     
     # Convert 'new_irw_ms' column to integer
     #interpolated_ms#['new_sw_ms'] = interpolated_sw['new_sw_ms'].astype(int)
@@ -347,14 +324,20 @@ def fao_sw_to_irw ():
     
     # Filter the columns that start with 'Y' and do not end with a letter
     keep_columns = ['Area Code', 'Area', 'Item Code','Item_orig', 'Item', 'Element Code', 'Element_orig', 'Unit']
-    df = df.loc[:, keep_columns + df.columns[(df.columns.str.startswith('Y')) & ~(df.columns.str.endswith(('F', 'N')))].tolist()]
+    year_columns = [col for col in df.columns if YEAR_COL_RE.match(col)]
+    df = df.loc[:, keep_columns + year_columns]
     
     
     # Rename columns to remove 'Y' prefix for the year
-    new_columns = {col: col[1:] if col.startswith('Y') else col for col in df.columns}
+    new_columns = {col: col[1:] for col in year_columns}
     df = df.rename(columns=new_columns)
     
-    df_ms = df.query('Item == "sawnwood_broad" | Item == "sawnwood_con" ').copy()
+    first_year = 2021
+    last_year = 2023
+    years = [str(year) for year in range(first_year, last_year)]
+    # copy only the rows and years used below
+    selector = df['Item'].isin(["sawnwood_broad", "sawnwood_con"])
+    df_ms = df.loc[selector, ['Area', 'Item', 'Element_orig'] + years].copy()
     
     shorts_mapping = {
                 'Production': 'prod',
@@ -362,13 +345,11 @@ def fao_sw_to_irw ():
                 'Export Quantity': 'exp'}
     df_ms.loc[:, 'Element_ms'] = df_ms.loc[:,'Element_orig'].map(shorts_mapping)
     
-    first_year = 2021
-    last_year = 2023
-    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + [str(year) for year in range(first_year, last_year)]]
+    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + years]
     
     df_ms = pd.melt(df_ms, id_vars=['Area', 'Item', 'Element_ms'], var_name='Year', value_name='Value')
     
-    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year']).agg(
+    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year'], observed=True).agg(
                             irw_ms=('Value', 'sum'),
     ).reset_index()
     
@@ -376,7 +357,7 @@ def fao_sw_to_irw ():
     df_ms=df_ms.query ('Element_ms == "prod" ')
     df_ms = df_ms.query('Year == "2021" | Year == "2022" ')
     
-    average_sw_ms = df_ms.groupby(['Area', 'Item'])['irw_ms'].mean().reset_index()
+    average_sw_ms = df_ms.groupby(['Area', 'Item'], sort=False, observed=True)['irw_ms'].mean().reset_index()
     
     average_sw_ms = average_sw_ms.pivot(index= 'Area', columns='Item', values='irw_ms').reset_index()
     
@@ -403,14 +384,20 @@ def fao_wp_to_irw ():
     
     # Filter the columns that start with 'Y' and do not end with a letter
     keep_columns = ['Area Code', 'Area', 'Item Code','Item_orig', 'Item', 'Element Code', 'Element_orig', 'Unit']
-    df = df.loc[:, keep_columns + df.columns[(df.columns.str.startswith('Y')) & ~(df.columns.str.endswith(('F', 'N')))].tolist()]
+    year_columns = [col for col in df.columns if YEAR_COL_RE.match(col)]
+    df = df.loc[:, keep_columns + year_columns]
     
     
     # Rename columns to remove 'Y' prefix for the year
-    new_columns = {col: col[1:] if col.startswith('Y') else col for col in df.columns}
+    new_columns = {col: col[1:] for col in year_columns}
     df = df.rename(columns=new_columns)
     
-    df_ms = df.query(' Item == "wood_panels" ').copy()
+    first_year = 2021
+    last_year = 2023
+    years = [str(year) for year in range(first_year, last_year)]
+    # copy only the rows and years used below
+    selector = df['Item'].isin(["wood_panels"])
+    df_ms = df.loc[selector, ['Area', 'Item', 'Element_orig'] + years].copy()
     
     shorts_mapping = {
                 'Production': 'prod',
@@ -418,13 +405,11 @@ def fao_wp_to_irw ():
                 'Export Quantity': 'exp'}
     df_ms.loc[:,'Element_ms'] = df_ms.loc[:,'Element_orig'].map(shorts_mapping)
     
-    first_year = 2021
-    last_year = 2023
-    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + [str(year) for year in range(first_year, last_year)]]
+    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + years]
     
     df_ms = pd.melt(df_ms, id_vars=['Area', 'Item', 'Element_ms'], var_name='Year', value_name='Value')
     
-    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year']).agg(
+    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year'], observed=True).agg(
                             irw_ms=('Value', 'sum'),
     ).reset_index()
     
@@ -432,7 +417,7 @@ def fao_wp_to_irw ():
     df_ms=df_ms.query ('Element_ms == "prod" ')
     df_ms = df_ms.query('Year == "2021" | Year == "2022" ')
     
-    average_wp_ms = df_ms.groupby(['Area', 'Item'])['irw_ms'].mean().reset_index()
+    average_wp_ms = df_ms.groupby(['Area', 'Item'], sort=False, observed=True)['irw_ms'].mean().reset_index()
     
     average_wp_ms = average_wp_ms.pivot(index= 'Area', columns='Item', values='irw_ms').reset_index()
     
@@ -456,14 +441,20 @@ def fao_pulp_to_irw ():
     
     # Filter the columns that start with 'Y' and do not end with a letter
     keep_columns = ['Area Code', 'Area', 'Item Code','Item_orig', 'Item', 'Element Code', 'Element_orig', 'Unit']
-    df = df.loc[:, keep_columns + df.columns[(df.columns.str.startswith('Y')) & ~(df.columns.str.endswith(('F', 'N')))].tolist()]
+    year_columns = [col for col in df.columns if YEAR_COL_RE.match(col)]
+    df = df.loc[:, keep_columns + year_columns]
     
     
     # Rename columns to remove 'Y' prefix for the year
-    new_columns = {col: col[1:] if col.startswith('Y') else col for col in df.columns}
+    new_columns = {col: col[1:] for col in year_columns}
     df = df.rename(columns=new_columns)
     
-    df_ms = df.query('Item == "wood_pulp" ').copy()
+    first_year = 2021
+    last_year = 2023
+    years = [str(year) for year in range(first_year, last_year)]
+    # copy only the rows and years used below
+    selector = df['Item'].isin(["wood_pulp"])
+    df_ms = df.loc[selector, ['Area', 'Item', 'Element_orig'] + years].copy()
     
     shorts_mapping = {
                 'Production': 'prod',
@@ -471,13 +462,11 @@ def fao_pulp_to_irw ():
                 'Export Quantity': 'exp'}
     df_ms.loc[:,'Element_ms'] = df_ms.loc[:,'Element_orig'].map(shorts_mapping)
     
-    first_year = 2021
-    last_year = 2023
-    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + [str(year) for year in range(first_year, last_year)]]
+    df_ms = df_ms.loc[:, ['Area', 'Item', 'Element_ms'] + years]
        
     df_ms = pd.melt(df_ms, id_vars=['Area', 'Item', 'Element_ms'], var_name='Year', value_name='Value')
     
-    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year']).agg(
+    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year'], observed=True).agg(
                             irw_ms=('Value', 'sum'),
     ).reset_index()
     
@@ -485,7 +474,7 @@ def fao_pulp_to_irw ():
     df_ms=df_ms.query ('Element_ms == "prod" ')
     df_ms = df_ms.query('Year == "2021" | Year == "2022" ')
     
-    average_pulp_ms = df_ms.groupby(['Area', 'Item'])['irw_ms'].mean().reset_index()
+    average_pulp_ms = df_ms.groupby(['Area', 'Item'], sort=False, observed=True)['irw_ms'].mean().reset_index()
     
     average_pulp_ms = average_pulp_ms.pivot(index= 'Area', columns='Item', values='irw_ms').reset_index()
         
@@ -516,11 +505,12 @@ def gap_filling_irw_faostat():
     
     # Filter the columns that start with 'Y' and do not end with a letter
     keep_columns = ['Area Code', 'Area', 'Item Code','Item_orig', 'Item', 'Element Code', 'Element_orig', 'Unit']
-    df = df.loc[:, keep_columns + df.columns[(df.columns.str.startswith('Y')) & ~(df.columns.str.endswith(('F', 'N')))].tolist()]
+    year_columns = [col for col in df.columns if YEAR_COL_RE.match(col)]
+    df = df.loc[:, keep_columns + year_columns]
     
     
     # Rename columns to remove 'Y' prefix for the year
-    new_columns = {col: col[1:] if col.startswith('Y') else col for col in df.columns}
+    new_columns = {col: col[1:] for col in year_columns}
     df = df.rename(columns=new_columns)
    
     df_ms = df.query('Item == "irw_broad" | Item == "irw_con" ').copy()
@@ -542,25 +532,27 @@ def gap_filling_irw_faostat():
     
     df_ms = pd.melt(df_ms, id_vars=['Area', 'Item', 'Element_ms'], var_name='Year', value_name='Value')
     
-    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year']).agg(
+    df_ms = df_ms.groupby(['Area', 'Item', 'Element_ms', 'Year'], observed=True).agg(
                             irw_ms=('Value', 'sum'),
     ).reset_index()
     
     #df_ms.to_csv('C:/CBM/df_ms.csv')
     
-    # Group by Area, Item, and Element
-    grouped = df_ms.groupby(['Area', 'Item', 'Element_ms'])
-
-    # Filter out groups where any value is zero within the time series
-    complete_groups = grouped.filter(lambda x: not (x['irw_ms'] == 0).any())
+    # Filter out Area, Item and Element groups where any value is zero within the time series
+    has_zero = df_ms['irw_ms'] == 0
+    incomplete = has_zero.groupby([df_ms['Area'], df_ms['Item'], df_ms['Element_ms']],
+                                  observed=True).transform('any')
+    complete_groups = df_ms[~incomplete]
 
     # Group by Area, Item, and Element and sum the amount
-    df_eu = complete_groups.groupby(['Item', 'Element_ms', 'Year'])['irw_ms'].sum().reset_index()
+    df_eu = complete_groups.groupby(['Item', 'Element_ms', 'Year'], observed=True)['irw_ms'].sum().reset_index()
     df_eu =df_eu.rename(columns = {'irw_ms':'irw_eu', 'Element_ms':'Element_eu'})
     
     df_faostat = df_ms.merge(df_eu, on = ['Item','Year'])
     #df_faostat = df_faostat.sort_values (by = ['Area','Item', 'Element', 'Year'] )
-    df_faostat.replace(0, np.nan, inplace=True)
+    # Only the quantity columns can hold zeros to mark as missing
+    irw_cols = ['irw_ms', 'irw_eu']
+    df_faostat[irw_cols] = df_faostat[irw_cols].mask(df_faostat[irw_cols] == 0)
         
     #df_faostat.to_csv('C:/CBM/df_faostat.csv')
     return df_faostat
@@ -578,22 +570,9 @@ def gapfill_irw_ms_backward(df):
     # Reset the index to ensure consecutive integers
     interpolated_df.reset_index(drop=True, inplace=True)
     
-    # Reverse the DataFrame to fill missing values in reverse order
-    interpolated_df = interpolated_df.iloc[::-1]
-    
-    # Fill missing values in new_irw_ms using the ratio
-    for index, row in interpolated_df.iterrows():
-        if pd.isnull(row['irw_ms']):
-            next_value = interpolated_df.at[index + 1, 'new_irw_ms']
-            if not pd.isnull(next_value):
-                interpolated_df.at[index, 'new_irw_ms'] = int(next_value / row['ratio'])
-            else:
-                interpolated_df.at[index, 'new_irw_ms'] = next_value  # Keep NaN if next value is NaN
-        else:
-            interpolated_df.at[index, 'new_irw_ms'] = row['irw_ms']
-    
-    # Reverse the DataFrame back to the original order
-    interpolated_df = interpolated_df.iloc[::-1]
+    # Fill missing values in new_irw_ms using the ratio, from the last row backward
+    interpolated_df['new_irw_ms'] = backward_fill_with_ratio(interpolated_df['irw_ms'],
+                                                             interpolated_df['ratio'])
     
     # Drop the temporary 'ratio' column as it's no longer needed
     interpolated_df.drop(columns=['ratio'], inplace=True)
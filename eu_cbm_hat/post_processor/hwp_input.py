@@ -1,8 +1,14 @@
 
 from eu_cbm_hat import eu_cbm_data_pathlib
 from functools import cached_property
+import re
 import pandas as pd
 
+# FAOSTAT year value columns such as "Y1961", the "Y1961F" and "Y1961N"
+# flag columns do not match
+YEAR_COL_RE = re.compile(r"^Y\d{4}$")
+
+
 class HWPInput():
     """Input data for Harvested Wood Product sink computation"""
 
@@ -23,14 +29,36 @@ class HWPInput():
     
     @cached_property
     def faostat_bulk_data (self):
-        #faostat as downloaded as bulk from FAOSTAT, namely :"Forestry_E_Europe" is a bulk download from  FAOSTAT. 
-        Faostat_bulk_data = pd.read_csv(eu_cbm_data_pathlib / 'common/Forestry_E_Europe.csv', low_memory=False)
+        #faostat as downloaded as bulk from FAOSTAT, namely :"Forestry_E_Europe" is a bulk download from  FAOSTAT.
+        # Read in chunks and keep only the quantity rows of the items listed
+        # in hwp_types. All users of this table drop the "Value" (monetary)
+        # elements and merge on hwp_types anyway, so the full bulk file never
+        # needs to be held in memory at once.
+        csv_path = eu_cbm_data_pathlib / 'common/Forestry_E_Europe.csv'
+        header = pd.read_csv(csv_path, nrows=0).columns
+        # identifier columns and year columns, without the year flag columns
+        id_columns = ['Area Code', 'Area', 'Item Code', 'Item', 'Element Code', 'Element', 'Unit']
+        year_columns = [col for col in header if YEAR_COL_RE.match(col)]
+        item_codes = self.hwp_types['Item Code'].unique()
+        chunks = pd.read_csv(csv_path, usecols=id_columns + year_columns,
+                             low_memory=False, chunksize=100_000)
+        Faostat_bulk_data = pd.concat(
+            [chunk[~chunk['Element'].str.contains('Value') & chunk['Item Code'].isin(item_codes)]
+             for chunk in chunks],
+            ignore_index=True)
+        # the label columns repeat over many rows, convert them once the
+        # chunks are combined so that all rows share the same categories
+        Faostat_bulk_data = Faostat_bulk_data.astype(
+            {'Area': 'category', 'Item': 'category', 'Element': 'category', 'Unit': 'category'})
         return Faostat_bulk_data
 
     @cached_property
     def euwrb_stat (self):
         # input Sankey data
-        EUwrb_stat = pd.read_csv(eu_cbm_data_pathlib / 'common/forestry_sankey_data.csv')
+        # only the columns used in hwp.eu_wrb, parsed by the multithreaded pyarrow reader
+        EUwrb_stat = pd.read_csv(eu_cbm_data_pathlib / 'common/forestry_sankey_data.csv',
+                                 engine='pyarrow',
+                                 usecols=['scenario', 'country', 'year', 'label', 'data', 'unit'])
         return EUwrb_stat
 
     @cached_property
@@ -42,7 +70,10 @@ class HWPInput():
     @cached_property
     def crf_stat (self):
         # crf sumbissions
-        CRF_stat = pd.read_csv(eu_cbm_data_pathlib / 'common/hwp_crf_submission_2023.csv')
+        # parse the CRF notation keys as missing so that the quantity
+        # columns are read as float directly
+        CRF_stat = pd.read_csv(eu_cbm_data_pathlib / 'common/hwp_crf_submission_2023.csv',
+                               na_values=["NO", "NE", "NA", "NA,NE"])
         CRF_stat = CRF_stat.rename(columns = {'country':'area'})
         return CRF_stat
 
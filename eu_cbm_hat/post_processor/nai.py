@@ -5,11 +5,10 @@ The purpose of this script is to compute the Net Annual Increment for one countr
 from functools import cached_property
 from typing import Union, List
 import warnings
-import pandas
-
 import numpy as np
+import pandas
 
-from eu_cbm_hat.post_processor.convert import ton_carbon_to_m3_ob
+from eu_cbm_hat import CARBON_FRACTION_OF_BIOMASS
 
 POOLS_COLS = ["merch_stock_vol", "agb_stock_vol"]
 FLUXES_COLS = [
@@ -23,6 +22,42 @@ FLUXES_COLS = [
     "oth_air_vol",
 ]
 NAI_AGG_COLS = ["area"] + POOLS_COLS + FLUXES_COLS
+# Carbon pools and fluxes in tons of carbon and the volume columns derived
+# from them
+CARBON_TO_VOL_COLS = {
+    "merch": "merch_stock_vol",
+    "agb": "agb_stock_vol",
+    "merch_prod": "merch_prod_vol",
+    "oth_prod": "other_prod_vol",
+    "disturbance_merch_to_air": "merch_air_vol",
+    "disturbance_oth_to_air": "oth_air_vol",
+    "turnover_merch_litter_input": "turnover_merch_input_vol",
+    "turnover_oth_litter_input": "turnover_oth_input_vol",
+    "disturbance_merch_litter_input": "dist_merch_input_vol",
+    "disturbance_oth_litter_input": "dist_oth_input_vol",
+}
+
+
+def add_nf_fluxes_to_foraws(df_agg: pandas.DataFrame, groupby: List[str]):
+    """Add the fluxes of NF to the fluxes of ForAWS, in place
+
+    NF rows are matched to the ForAWS row of the same year and of the same
+    values of the other groupby variables. ForAWS rows without a matching NF
+    row are left unchanged. The NF rows themselves keep their fluxes.
+
+    The NF fluxes added are also kept in the `*_vol_nf` columns, they are zero
+    on rows other than ForAWS.
+    """
+    keys = ["year"] + [x for x in groupby if x != "status"]
+    fluxes_cols_nf = [x.replace("_vol", "_vol_nf") for x in FLUXES_COLS]
+    is_nf = (df_agg["status"] == "NF").to_numpy()
+    is_foraws = (df_agg["status"] == "ForAWS").to_numpy()
+    nf_fluxes = df_agg.loc[is_nf].set_index(keys)[FLUXES_COLS]
+    foraws_index = df_agg.loc[is_foraws].set_index(keys).index
+    nf_fluxes = nf_fluxes.reindex(foraws_index, fill_value=0).to_numpy()
+    df_agg[fluxes_cols_nf] = 0.0
+    df_agg.loc[is_foraws, fluxes_cols_nf] = nf_fluxes
+    df_agg.loc[is_foraws, FLUXES_COLS] += nf_fluxes
 
 
 def compute_nai_gai(df: pandas.DataFrame, groupby: Union[List[str], str]):
@@ -75,41 +110,46 @@ def compute_nai_gai(df: pandas.DataFrame, groupby: Union[List[str], str]):
         raise ValueError(msg)
 
     # Compute the difference in stock for the standing biomass
-    # Use Observed = True to avoid the warning when using categorical variables
-    df["net_merch"] = df.groupby(groupby, observed=True)["merch_stock_vol"].diff()
-    df["net_agb"] = df.groupby(groupby, observed=True)["agb_stock_vol"].diff()
+    # The data is sorted by group then year above, so the difference within
+    # groups is the difference between consecutive rows, except on the first
+    # row of each group where the groupby variables change
+    keys = df[groupby]
+    first_in_group = keys.ne(keys.shift()).any(axis=1).to_numpy()
+    stock = df[POOLS_COLS].to_numpy()
+    net = np.empty_like(stock)
+    net[1:] = stock[1:] - stock[:-1]
+    net[first_in_group] = np.nan
+    df[["net_merch", "net_agb"]] = net
+
+    # The first year of each group has no stock difference. Missing values
+    # count as zero as they did with sum(axis=1), fill them once and use plain
+    # additions instead of row wise sums.
+    val = df[["net_merch", "net_agb"] + FLUXES_COLS].fillna(0)
 
     # Compute NAI for the merchantable pool
-    df["nai_merch"] = df[["net_merch", "merch_prod_vol", "dist_merch_input_vol"]].sum(
-        axis=1
+    df["nai_merch"] = val["net_merch"] + val["merch_prod_vol"] + val["dist_merch_input_vol"]
+    df["gai_merch"] = df["nai_merch"] + (
+        val["turnover_merch_input_vol"] + val["merch_air_vol"]
     )
-    df["gai_merch"] = df["nai_merch"] + df[
-        ["turnover_merch_input_vol", "merch_air_vol"]
-    ].sum(axis=1)
 
     # Compute NAI for the merchantable pool and OWC pool together
-    df["nai_agb"] = df[
-        [
-            "net_agb",
-            "merch_prod_vol",
-            "other_prod_vol",
-            "dist_merch_input_vol",
-            "dist_oth_input_vol",
-        ]
-    ].sum(axis=1)
-    df["gai_agb"] = df["nai_agb"] + df[
-        [
-            "turnover_merch_input_vol",
-            "turnover_oth_input_vol",
-            "merch_air_vol",
-            "oth_air_vol",
-        ]
-    ].sum(axis=1)
-    # Compute per hectare values
-    df["nai_merch_ha"] = df["nai_merch"] / df["area"]
-    df["gai_merch_ha"] = df["gai_merch"] / df["area"]
-    df["nai_agb_ha"] = df["nai_agb"] / df["area"]
-    df["gai_agb_ha"] = df["gai_agb"] / df["area"]
+    df["nai_agb"] = (
+        val["net_agb"]
+        + val["merch_prod_vol"]
+        + val["other_prod_vol"]
+        + val["dist_merch_input_vol"]
+        + val["dist_oth_input_vol"]
+    )
+    df["gai_agb"] = df["nai_agb"] + (
+        val["turnover_merch_input_vol"]
+        + val["turnover_oth_input_vol"]
+        + val["merch_air_vol"]
+        + val["oth_air_vol"]
+    )
+    # Compute per hectare values, dividing the 4 columns by the area at once
+    increment_cols = ["nai_merch", "gai_merch", "nai_agb", "gai_agb"]
+    per_ha = df[increment_cols].div(df["area"], axis=0)
+    df[[x + "_ha" for x in increment_cols]] = per_ha.to_numpy()
     return df
 
 
@@ -149,10 +189,7 @@ class NAI:
         3  2002  ForAWS  91879.99877  378072.436366  212918.717178
         4  2003  ForAWS  91879.99841  397329.021290  496215.446031
 
-        >>> # TODO fix this example
         >>> # NAI per ha by status and forest type at country level
-        >>> # See message below on KeyError: 'forest_type'
-        >>> # when merging back the movements of the NF pools to products.
         >>> runner.post_processor.nai.df_agg(["status", "forest_type"]) # doctest: +SKIP
 
         >>> df = runner.post_processor.nai.df_agg(["status"])
@@ -183,45 +220,49 @@ class NAI:
         self.parent = parent
         self.runner = parent.runner
         self.combo_name = self.runner.combo.short_name
+        # Groupby variables already warned about, to warn only once for each
+        self.groupby_warned = set()
 
     @cached_property
     def pools_fluxes_vol(self):
         """Merchantable pools and fluxes aggregated at the classifiers level"""
         df = self.parent.pools_fluxes_morf
-        # Add wood density information by forest type
-        df = df.merge(self.parent.wood_density_bark_frac, on="forest_type")
-
-        # Convert tons of carbon to volume over bark
-        df["merch_stock_vol"] = ton_carbon_to_m3_ob(df, "merch")
-        df["agb"] = df["merch"] + df["other"]
-        df["agb_stock_vol"] = ton_carbon_to_m3_ob(df, "agb")
-    
-        # Fluxes to products
-        df["merch_prod_vol"] = ton_carbon_to_m3_ob(df, "merch_prod")
-        df["other_prod_vol"] = ton_carbon_to_m3_ob(df, "oth_prod")
-
-        # Fluxes which represent the biomass lost to the air
-        df["merch_air_vol"] = ton_carbon_to_m3_ob(df, "disturbance_merch_to_air")
-        df["oth_air_vol"] = ton_carbon_to_m3_ob(df, "disturbance_oth_to_air")
-
-        df["turnover_merch_input_vol"] = ton_carbon_to_m3_ob(
-            df, "turnover_merch_litter_input"
-        )
-        df["turnover_oth_input_vol"] = ton_carbon_to_m3_ob(
-            df, "turnover_oth_litter_input"
+        # Add wood density information by forest type, as a lookup on the
+        # forest type rather than a join. assign returns a new frame so the
+        # parent's cached table is not modified.
+        wood = self.parent.wood_density_bark_frac
+        duplicated = wood["forest_type"].duplicated()
+        if duplicated.any():
+            msg = "The wood density table has more than one row for the forest types "
+            msg += f"{wood.loc[duplicated, 'forest_type'].unique().tolist()}"
+            raise ValueError(msg)
+        wood = wood.set_index("forest_type")
+        # Keep only the forest types that have a wood density, as the inner
+        # merge did, otherwise their area would count without any volume
+        df = df[df["forest_type"].isin(wood.index)].reset_index(drop=True)
+        df = df.assign(
+            wood_density=df["forest_type"].map(wood["wood_density"]),
+            bark_frac=df["forest_type"].map(wood["bark_frac"]),
         )
+        # Grouping keys with few distinct values, group on their integer codes
+        df["status"] = df["status"].astype("category")
+        df["forest_type"] = df["forest_type"].astype("category")
+        # Above ground biomass
+        df["agb"] = df["merch"] + df["other"]
 
-        # these filters for "== 0" are not needed as such transfers are zero anyway
-        df["dist_merch_input_vol"] = np.where(
-            df["disturbance_type"] == 0,
-            0,
-            ton_carbon_to_m3_ob(df, "disturbance_merch_litter_input"),
-        )
-        df["dist_oth_input_vol"] = np.where(
-            df["disturbance_type"] == 0,
-            0,
-            ton_carbon_to_m3_ob(df, "disturbance_oth_litter_input"),
+        # Convert tons of carbon to volume over bark as in ton_carbon_to_m3_ob,
+        # with the divisor computed once and applied to all columns at once
+        divisor = CARBON_FRACTION_OF_BIOMASS * df["wood_density"].to_numpy()
+        carbon = df[list(CARBON_TO_VOL_COLS)].to_numpy()
+        # Add the volume columns as one block rather than one column at a time
+        volumes = pandas.DataFrame(
+            carbon / divisor[:, None],
+            columns=list(CARBON_TO_VOL_COLS.values()),
+            index=df.index,
         )
+        df = pandas.concat([df, volumes], axis=1)
+        # Disturbance litter inputs need no filter on disturbance_type == 0, as
+        # such transfers are zero anyway
         return df
 
     def df_agg(self, groupby: Union[List[str], str]):
@@ -246,35 +287,33 @@ class NAI:
         """
         if isinstance(groupby, str):
             groupby = [groupby]
-        if groupby != ["status"]:
+        if groupby != ["status"] and tuple(groupby) not in self.groupby_warned:
+            self.groupby_warned.add(tuple(groupby))
             warnings.warn("This method was written for a group by status.")
+        return self.aggregate_nai(groupby)
+
+    def aggregate_nai(self, groupby: List[str]):
+        """Aggregate pools and fluxes along the groupby variables and year,
+        add the NF fluxes to ForAWS and compute NAI and GAI
+
+        Shared by df_agg and df_agg_con_broad.
+        """
         df = self.pools_fluxes_vol
 
         # Aggregate the sum of selected columns
         df_agg = (
-            df.groupby(["year"] + groupby)[NAI_AGG_COLS].agg("sum").reset_index()
+            df.groupby(["year"] + groupby, observed=True)[NAI_AGG_COLS]
+            .agg("sum")
+            .reset_index()
         )
 
         # Add NF movements to products back to ForAWS
-        # Note this is a problem when we use grouping variables other than
-        # "status" alone For example if groupby = ["status", "forest_type"]
-        # the merge below generates the KeyError: 'forest_type'
-        selector = df_agg["status"] == "NF"
-        df_agg_nf = df_agg.loc[selector, ["year", "status"] + FLUXES_COLS].copy()
-        df_agg_nf["status"] = "ForAWS"
-        df_agg_nf.columns = df_agg_nf.columns.str.replace("_vol", "_vol_nf")
-        df_agg = df_agg.merge(df_agg_nf, on=["year"] + groupby, how="left")
-        fluxes_cols_nf = [x + "_nf" for x in FLUXES_COLS]
-        df_agg[fluxes_cols_nf] = df_agg[fluxes_cols_nf].fillna(0)
-        # Add the nf fluxes to the fluxes in ForAWS
-        for col1, col2 in zip(FLUXES_COLS, fluxes_cols_nf):
-            df_agg[col1] += df_agg[col2]
+        add_nf_fluxes_to_foraws(df_agg, groupby)
 
         # Compute NAI and GAI
         df_out = compute_nai_gai(df_agg, groupby=groupby)
         return df_out
 
-
     def df_agg_con_broad(self, groupby: Union[List[str], str]):
         """Net Annual Increment aggregated by status and con_broad. It WILL NOT work properly when there are transitions from con to broad and viceversa.
         Usage:
@@ -287,29 +326,9 @@ class NAI:
         """
         if isinstance(groupby, str):
             groupby = [groupby]
-        if groupby != ["status", "con_broad"]:
+        if groupby != ["status", "con_broad"] and tuple(groupby) not in self.groupby_warned:
+            self.groupby_warned.add(tuple(groupby))
             warnings.warn("This method was written for a group by status.")
-        df = self.pools_fluxes_vol
-
-        # Aggregate the sum of selected columns
-        df_agg = (
-            df.groupby(["year"] + groupby)[NAI_AGG_COLS].agg("sum").reset_index()
-        )
-        # Add NF movements to products back to ForAWS
-        # Note this is a problem when we use grouping variables other than
-        # "status" alone For example if groupby = ["status", "forest_type"]
-        # the merge below generates the KeyError: 'forest_type'
-        selector = df_agg["status"] == "NF"
-        df_agg_nf = df_agg.loc[selector, ["year", "status", "con_broad"] + FLUXES_COLS].copy()
-        df_agg_nf["status"] = "ForAWS"
-        df_agg_nf.columns = df_agg_nf.columns.str.replace("_vol", "_vol_nf")
-        df_agg = df_agg.merge(df_agg_nf, on=["year", "con_broad"] + groupby, how="left")
-        fluxes_cols_nf = [x + "_nf" for x in FLUXES_COLS]
-        df_agg[fluxes_cols_nf] = df_agg[fluxes_cols_nf].fillna(0)
-        # Add the nf fluxes to the fluxes in ForAWS
-        for col1, col2 in zip(FLUXES_COLS, fluxes_cols_nf):
-            df_agg[col1] += df_agg[col2]
-        # Compute NAI and GAI
-        df_out_con_broad = compute_nai_gai(df_agg, groupby=groupby)
+        df_out_con_broad = self.aggregate_nai(groupby)
         df_out_con_broad = df_out_con_broad[df_out_con_broad["status"] != "NF"]
         return df_out_con_broad
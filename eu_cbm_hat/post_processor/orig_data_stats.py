@@ -49,7 +49,9 @@ def classifiers_one_country(combo_name: str, iso2_code: str):
     return df.loc[selector].copy()
 
 
-def classifiers_all_countries(combo_name):
+def classifiers_all_countries(combo_name, num_cpus=None):
     """Classifiers of the country orig data in all countries"""
-    df_all = apply_to_all_countries(classifiers_one_country, combo_name=combo_name)
+    df_all = apply_to_all_countries(
+        classifiers_one_country, combo_name=combo_name, num_cpus=num_cpus
+    )
     return df_all
@@ -92,12 +92,13 @@ def generate_all_combinations_and_fill_na(df, groupby):
     # Prepare all combinations of groupby variables except year
     groupby_area_diff.remove("year")
     all_groups = df[groupby_area_diff].drop_duplicates()
-    years = list(df["year"].unique())
+    years = df["year"].unique()
+    # Repeat each year for all groups and tile the groups for all years
     combi_dict = {
-        "year": [y for y in years for _ in range(len(all_groups))],
+        "year": np.repeat(years, len(all_groups)),
     }
     for var in groupby_area_diff:
-        combi_dict[var] = all_groups[var].tolist() * len(years)
+        combi_dict[var] = np.tile(all_groups[var].to_numpy(), len(years))
     all_combinations = pandas.DataFrame(combi_dict)
     # Do a full join to make NA values apparent in order to compute the diff in
     # area or stock later
@@ -105,9 +106,7 @@ def generate_all_combinations_and_fill_na(df, groupby):
     df.fillna(0, inplace=True)
     df.sort_values(groupby_area_diff + ["year"], inplace=True)
     # Compute the area diff and check the diff sums to zero
-    df["area_diff"] = df.groupby(groupby_area_diff)["area"].transform(
-        lambda x: x.diff()
-    )
+    df["area_diff"] = df.groupby(groupby_area_diff)["area"].diff()
     diff_sum = abs(df.groupby("year")["area_diff"].sum())
     assert all(diff_sum < 100)
     return df
@@ -368,7 +367,7 @@ class Sink:
         df.sort_values(groupby_sink + ["year"], inplace=True)
 
         # Add area at {t-1} to compare with area at t
-        df["area_tm1"] = df.groupby(groupby_sink)["area"].transform(lambda x: x.shift())
+        df["area_tm1"] = df.groupby(groupby_sink)["area"].shift()
 
         # Check that the total area didn't change between t-1 and t
         # Note: the status can change but the total area should remain constant
@@ -384,18 +383,17 @@ class Sink:
             # Aggregate all pool columns to one pool value for this key
             df[key + "_stock"] = df[self.pools_dict[key]].sum(axis=1)
 
-            # Keep stock at {t-1} for debugging purposes
-            df[key + "_stock_tm1"] = df.groupby(groupby_sink)[key + "_stock"].transform(
-                lambda x: x.shift()
-            )
-
-            # Compute the stock change per hectare
-            # TODO: change the computation of the stock change so that
-            # It becomes possible to analyse stock_t, stock_{t-1}
-            df[key + "_stk_ch"] = df.groupby(groupby_sink)[key + "_stock"].transform(
-                lambda x: x.diff()
-            )
+        # Shift and diff all stock columns in one groupby pass
+        keys = list(self.pools_dict)
+        grouped = df.groupby(groupby_sink)[[key + "_stock" for key in keys]]
+        # Keep stock at {t-1} for debugging purposes
+        df[[key + "_stock_tm1" for key in keys]] = grouped.shift().to_numpy()
+        # Compute the stock change per hectare
+        # TODO: change the computation of the stock change so that
+        # It becomes possible to analyse stock_t, stock_{t-1}
+        df[[key + "_stk_ch" for key in keys]] = grouped.diff().to_numpy()
 
+        for key in self.pools_dict:
             # Remove the NF soil pool content for the area afforested in current year
             if "soil" in key:
                 nf_slow_soil = (
@@ -1,8 +1,9 @@
 """Process the stock output from the model"""
 from typing import List, Union
 from functools import cached_property
+import numpy as np
 from eu_cbm_hat.post_processor.harvest import ton_carbon_to_m3_ub
-from eu_cbm_hat.post_processor.convert import ton_carbon_to_m3_ob
+from eu_cbm_hat import CARBON_FRACTION_OF_BIOMASS
 import pandas as pd
 
 class Stock:
@@ -23,6 +24,11 @@ class Stock:
         self.combo_name = self.runner.combo.short_name
         self.pools = self.parent.pools
         self.fluxes = self.parent.fluxes
+        # Dead wood tables already computed, by method name and groupby
+        # variables. They only depend on self.pools and self.fluxes, which are
+        # set once above. Callers get copies so that changing a returned table
+        # doesn't change the cached one.
+        self.dw_cache = {}
         
     def volume_standing_stocks(self, groupby: Union[List[str], str] = None):
         """Estimate the mean ratio of standing stocks, ONLY merchantable"""
@@ -31,8 +37,11 @@ class Stock:
         df = self.pools
         df = df.merge(self.parent.wood_density_bark_frac, on="forest_type")
         df = df[df ['status'] != 'NF']
-        df["broad_standing_vol_ob"] = ton_carbon_to_m3_ob(df, "hardwood_merch")
-        df["con_standing_vol_ob"] = ton_carbon_to_m3_ob(df, "softwood_merch")
+        # Convert to volume over bark as in ton_carbon_to_m3_ob, with the
+        # divisor computed once for both merchantable pools
+        divisor = CARBON_FRACTION_OF_BIOMASS * df["wood_density"].to_numpy()
+        merch = df[["hardwood_merch", "softwood_merch"]].to_numpy()
+        df[["broad_standing_vol_ob", "con_standing_vol_ob"]] = merch / divisor[:, None]
         # Aggregate separately for softwood and hardwood
         #groupby = ['year','status', 'con_broad']
                   
@@ -77,42 +86,50 @@ class Stock:
         
         if isinstance(groupby, str):
             groupby = [groupby]
+        key = ("dw_stock_ratio", tuple(groupby))
+        if key in self.dw_cache:
+            return self.dw_cache[key].copy()
         df = self.pools
 
         # Aggregate separately for softwood and hardwood
-        df_agg = df.groupby(groupby).agg(
+        # Keep the group keys as columns directly instead of resetting the index
+        df_agg = df.groupby(groupby, observed=True, as_index=False).agg(
             softwood_stem_snag_tc=("softwood_stem_snag", "sum"),
             softwood_merch_tc=("softwood_merch", "sum"),
             hardwood_stem_snag_tc=("hardwood_stem_snag", "sum"),
             hardwood_merch_tc=("hardwood_merch", "sum"),
-            area=("area", sum),
+            area=("area", "sum"),
             medium_tc=("medium_soil", "sum"),
         )
 
-        df_agg.reset_index(inplace=True)
-        df_agg["softwood_standing_dw_ratio"] = (
-            df_agg["softwood_stem_snag_tc"] / df_agg["softwood_merch_tc"]
-        )
-        df_agg["hardwood_standing_dw_ratio"] = (
-            df_agg["hardwood_stem_snag_tc"] / df_agg["hardwood_merch_tc"]
-        )
+        # Softwood and hardwood ratios in one division, the ratio is missing
+        # where there is no merchantable stock
+        snag = df_agg[["softwood_stem_snag_tc", "hardwood_stem_snag_tc"]].to_numpy()
+        merch = df_agg[["softwood_merch_tc", "hardwood_merch_tc"]].to_numpy()
+        ratios = np.divide(snag, merch, out=np.full(snag.shape, np.nan), where=merch != 0)
+        df_agg[["softwood_standing_dw_ratio", "hardwood_standing_dw_ratio"]] = ratios
         # agregate over con and broad
         df_agg["standing_dw_c_per_ha"] = (
             df_agg["hardwood_stem_snag_tc"] + df_agg["softwood_stem_snag_tc"]
         ) / df_agg["area"]
         df_agg["laying_dw_c_per_ha"] = df_agg["medium_tc"] / df_agg["area"]
-        return df_agg
+        self.dw_cache[key] = df_agg
+        return df_agg.copy()
 
     def dw_contribution_harvest(self, groupby: Union[List[str], str] = None):
         """Estimate the mean ratio of standing stocks, dead_wood to merchantable"""
         if isinstance(groupby, str):
             groupby = [groupby]
+        # The table is always by year, whatever the groupby argument
+        key = ("dw_contribution_harvest",)
+        if key in self.dw_cache:
+            return self.dw_cache[key].copy()
         df = self.fluxes
         # Aggregate separately for softwood and hardwood
         df_agg = df.groupby("year").agg(
             softwood_merch_prod=("softwood_merch_to_product", "sum"),
             softwood_snag_prod=("softwood_stem_snag_to_product", "sum"),
-            hardwood_merch_prod=("softwood_merch_to_product", "sum"),
+            hardwood_merch_prod=("hardwood_merch_to_product", "sum"),
             hardwood_snag_prod=("hardwood_stem_snag_to_product", "sum"),
         )
         df_agg["softwood_snag_harv_contrib"] = df_agg["softwood_snag_prod"] / (
@@ -121,7 +138,8 @@ class Stock:
         df_agg["hardwood_snag_harv_contrib"] = df_agg["hardwood_snag_prod"] / (
             df_agg["hardwood_snag_prod"] + df_agg["hardwood_merch_prod"]
         )
-        return df_agg
+        self.dw_cache[key] = df_agg
+        return df_agg.copy()
 
     def df_agg(self, groupby: Union[List[str], str] = None):
         """Aggregated stock data
@@ -206,10 +224,11 @@ class Stock:
         if isinstance(groupby, str):
             groupby = [groupby]
         df = self.pools
-        df['age_class'] = df.age // 10 + 1
-        df['age_class'] = 'AGEID' + df.age_class.astype(str)
+        # Pass the age class as a grouping key instead of adding it as a
+        # column, so that the shared pools data frame is left unchanged
+        age_class = ("AGEID" + (df["age"] // 10 + 1).astype(str)).rename("age_class")
         # Aggregate separately for softwood and hardwood
-        df_agg = df.groupby(groupby+ ['age_class']).agg(
+        df_agg = df.groupby([df[col] for col in groupby] + [age_class]).agg(
             softwood_stem_snag_tc=("softwood_stem_snag", "sum"),
             softwood_merch_tc=("softwood_merch", "sum"),
             hardwood_stem_snag_tc=("hardwood_stem_snag", "sum"),
@@ -218,12 +237,12 @@ class Stock:
             medium_tc=("medium_soil", "sum"),
         )
         df_agg.reset_index(inplace=True)
-        df_agg["softwood_standing_dw_ratio"] = (
-            df_agg["softwood_stem_snag_tc"] / df_agg["softwood_merch_tc"]
-        )
-        df_agg["hardwood_standing_dw_ratio"] = (
-            df_agg["hardwood_stem_snag_tc"] / df_agg["hardwood_merch_tc"]
-        )
+        # Softwood and hardwood ratios in one division, the ratio is missing
+        # where there is no merchantable stock
+        snag = df_agg[["softwood_stem_snag_tc", "hardwood_stem_snag_tc"]].to_numpy()
+        merch = df_agg[["softwood_merch_tc", "hardwood_merch_tc"]].to_numpy()
+        ratios = np.divide(snag, merch, out=np.full(snag.shape, np.nan), where=merch != 0)
+        df_agg[["softwood_standing_dw_ratio", "hardwood_standing_dw_ratio"]] = ratios
         # agregate over con and broad
         #df_agg["standing_dw_c_per_ha"] = (
         #    df_agg["hardwood_stem_snag_tc"] + df_agg["softwood_stem_snag_tc"]
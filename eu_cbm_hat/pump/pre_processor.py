@@ -9,11 +9,18 @@ Unit D1 Bioeconomy.
 """
 
 # Built-in modules #
+import os
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Third party modules #
+import numpy
 import pandas
+import pyarrow
+import pyarrow.compute as pc
+from pyarrow import csv
 
 # First party modules #
 from plumbing.databases.sqlite_database import SQLiteDatabase
@@ -21,6 +28,75 @@ from plumbing.databases.sqlite_database import SQLiteDatabase
 # Internal modules #
 from eu_cbm_hat.pump.long_or_wide import events_wide_to_long
 
+# The temporary AIDB is thrown away if the process fails while writing it,
+# so there is no need for a journal on disk nor to sync every transaction #
+TEMP_AIDB_PRAGMAS = [
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+]
+
+
+def pack_id_pairs(first, second):
+    """Pack two columns of ids below 2**32 into one array of uint64 keys."""
+    arrays = []
+    for col in (first, second):
+        values = col.to_numpy(numpy.int64)
+        if values.size and (values.min() < 0 or values.max() >= 2**32):
+            msg = "Column '%s' has values from %i to %i, outside of the "
+            msg += "range [0, 2**32) that can be packed into one key."
+            raise ValueError(msg % (col.name, values.min(), values.max()))
+        arrays.append(values.astype(numpy.uint64))
+    return (arrays[0] << numpy.uint64(32)) | arrays[1]
+
+
+def replace_dist_matrix_values(dm, dm_new):
+    """Replace rows of the default disturbance matrix values by new values.
+
+    Remove the combinations of disturbance_matrix_id and source_pool_id
+    present in the new values from the default table, then add the new
+    values. Both ids are small positive integers, pack each pair into a
+    single 64 bit key to compare the tables with one array lookup instead of
+    merging them.
+    """
+    ids = ["disturbance_matrix_id", "source_pool_id", "sink_pool_id"]
+    key_new = pack_id_pairs(dm_new["disturbance_matrix_id"], dm_new["source_pool_id"])
+    key_old = pack_id_pairs(dm["disturbance_matrix_id"], dm["source_pool_id"])
+    selector = ~numpy.isin(key_old, numpy.unique(key_new))
+    # Check that some of the default values are kept
+    if not selector.any():
+        msg = "The new values replace every row of the default disturbance "
+        msg += "matrix values, for the disturbance_matrix_id values %s."
+        raise ValueError(msg % numpy.unique(dm["disturbance_matrix_id"]).tolist())
+    df = dm.loc[selector, ids + ["proportion"]]
+
+    # Add the updated disturbance matrix values and reorder
+    df = pandas.concat([df, dm_new[ids + ["proportion"]]])
+    df = df.sort_values(ids)
+    # Drop the first index because it contains ids from both
+    # the old and new data frame
+    df.reset_index(drop=True, inplace=True)
+    df.reset_index(inplace=True)
+    return df
+
+
+@lru_cache(maxsize=2)
+def read_default_dist_matrix(aidb_path, mtime):
+    """Read the disturbance matrix values of a default AIDB.
+
+    The table is shared by all scenario combinations of a country, it is
+    read once per process. A run uses one AIDB, so only the last tables
+    read are kept. The modification time is part of the cache key so that
+    the table is read again if the AIDB file changes. Don't modify the
+    returned data frame in place.
+    """
+    db = SQLiteDatabase(aidb_path)
+    try:
+        return db.read_df("disturbance_matrix_value")
+    finally:
+        db.own_connection.close()
+
 
 ###############################################################################
 class PreProcessor(object):
@@ -55,9 +131,10 @@ class PreProcessor(object):
     def __call__(self):
         # Message #
         self.parent.log.info("Pre-processing input data.")
-        # Check empty lines in all CSV inputs #
-        for csv_path in self.all_csv:
-            self.raise_empty_lines(csv_path)
+        # Check empty lines in all CSV inputs, reading them in parallel #
+        all_csv = self.all_csv
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(all_csv)))) as pool:
+            list(pool.map(self.raise_empty_lines, all_csv))
         # Reshape the events file #
         self.reshape_events()
         # Check there are no negative timesteps #
@@ -77,6 +154,29 @@ class PreProcessor(object):
         ]
 
     # ------------------------------- Methods ---------------------------------#
+    @staticmethod
+    def read_csv_table(csv_path, columns=None):
+        """
+        Load one CSV file as an arrow table with the multithreaded pyarrow
+        reader, optionally only the given columns. Returns None if the file
+        is empty. Files that pyarrow cannot parse, for example because of
+        lines with missing separators, are loaded with pandas instead.
+        """
+        convert_options = csv.ConvertOptions(
+            include_columns=columns, strings_can_be_null=True
+        )
+        try:
+            return csv.read_csv(str(csv_path), convert_options=convert_options)
+        except pyarrow.ArrowInvalid:
+            pass
+        # Fall back on pandas #
+        try:
+            df = pandas.read_csv(str(csv_path), usecols=columns)
+        # If the file is empty we can skip it #
+        except pandas.errors.EmptyDataError:
+            return None
+        return pyarrow.Table.from_pandas(df, preserve_index=False)
+
     @staticmethod
     def raise_empty_lines(csv_path):
         """
@@ -84,19 +184,24 @@ class PreProcessor(object):
         lines.
         """
         # Load from disk #
-        try:
-            df = pandas.read_csv(str(csv_path))
+        table = PreProcessor.read_csv_table(csv_path)
         # If the file is empty we can skip it #
-        except pandas.errors.EmptyDataError:
+        if table is None or table.num_columns == 0:
+            return
+        # A line can only be empty if every column has missing values #
+        if any(col.null_count == 0 for col in table.columns):
             return
         # Get empty lines #
-        empty_lines = df.isnull().all(1)
+        empty_lines = pc.is_null(table.column(0))
+        for col in table.columns[1:]:
+            empty_lines = pc.and_(empty_lines, pc.is_null(col))
         # Check if there are any #
-        if not any(empty_lines):
+        num_empty = pc.sum(empty_lines).as_py() or 0
+        if num_empty == 0:
             return
         # Warn #
         msg = "The file '%s' has %i empty lines."
-        raise Exception(msg % (csv_path, empty_lines.sum()))
+        raise Exception(msg % (csv_path, num_empty))
 
     def reshape_events(self, debug=False):
         """Reshape the events file from the wide to the long format."""
@@ -118,16 +223,15 @@ class PreProcessor(object):
         """
         # Path to the file we want to check #
         path = str(self.input.paths.events)
-        # Load from disk #
-        try:
-            df = pandas.read_csv(path)
+        # Load only the step column from disk #
+        table = self.read_csv_table(path, columns=["step"])
         # If the file is empty we can skip it #
-        except pandas.errors.EmptyDataError:
+        if table is None:
             return
         # Get negative values #
-        negative_values = df["step"] < 0
+        num_negative = pc.sum(pc.less(table.column("step"), 0)).as_py() or 0
         # Check if there are any #
-        if not any(negative_values):
+        if num_negative == 0:
             return
         # Message #
         msg = (
@@ -136,7 +240,7 @@ class PreProcessor(object):
             " year that is anterior to the inventory start year configured."
         )
         # Raise #
-        raise Exception(msg % (path, negative_values.sum()))
+        raise Exception(msg % (path, num_negative))
 
     def copy_and_change_aidb(self):
         """Copy the AIDB and modify the disturbance matrix
@@ -156,38 +260,17 @@ class PreProcessor(object):
 
         # Load the reference disturbance matrix values and the new values
         dist_matrix_table_name = "disturbance_matrix_value"
-        dm = self.runner.country.aidb.db.read_df(dist_matrix_table_name)
+        orig_file = str(self.runner.country.aidb.default_aidb_path)
+        dm = read_default_dist_matrix(orig_file, os.path.getmtime(orig_file))
         dm_new = self.runner.silv.dist_matrix_value.df
 
-        # Find matching rows in the default AIDB
-        ids = ["disturbance_matrix_id", "source_pool_id", "sink_pool_id"]
-        df_match = dm.merge(dm_new[ids + ["proportion"]], on=ids, how="right")
-
-        # Remove those combinations of disturbance_matrix_id and source_pool_id
-        # from the table
-        df_match_id = df_match.value_counts(
-            ["disturbance_matrix_id", "source_pool_id"]
-        ).reset_index()
-        df = dm.merge(df_match_id, how="left", indicator=True)
-        # Check the indicator name didn't change
-        assert any(df["_merge"].str.contains("left_only"))
-        selector = df["_merge"] == "left_only"
-        df = df.loc[selector].copy()
-        df = df[ids + ["proportion"]]
-
-        # Add the updated disturbance matrix values and reorder
-        df = pandas.concat([df, dm_new[ids + ["proportion"]]])
-        df = df.sort_values(ids)
-        # Drop the first index because it contains ids from both
-        # the old and new data frame
-        df.reset_index(drop=True, inplace=True)
-        df.reset_index(inplace=True)
+        # Replace the default values by the new values
+        df = replace_dist_matrix_values(dm, dm_new)
 
         # Copy the default AIDB to a temporary location. This has been added
         # because the /eos large file system Doesn't handle database writes
         # very well on JRC's BDAP computing cluster.
         combo_name = self.runner.combo.short_name
-        orig_file = self.runner.country.aidb.default_aidb_path
         self.parent.log.info("AIDB %s" % orig_file)
         aidb_file_name = f"aidb_{combo_name}.db"
         with tempfile.TemporaryDirectory() as tmpdirname:
@@ -195,6 +278,8 @@ class PreProcessor(object):
             self.parent.log.info("Temporarily copied to %s" % temp_file)
             shutil.copy(orig_file, temp_file)
             temp_db = SQLiteDatabase(temp_file)
+            for pragma in TEMP_AIDB_PRAGMAS:
+                temp_db.own_connection.execute(pragma)
             # Write to the temporary AIDB
             temp_db.write_df(df, dist_matrix_table_name)
             # Change path to the modified AIDB
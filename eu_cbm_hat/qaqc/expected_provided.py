@@ -114,7 +114,7 @@ class ExpectedProvided:
         events["measurement_type"] = "amount_" + events["measurement_type"].str.lower()
         events_agg = (events
                       .groupby(index + ["measurement_type"])
-                      .agg(amount = ("amount", sum))
+                      .agg(amount = ("amount", "sum"))
                       .reset_index()
                       # Reshape measurement type in columns
                       .pivot(index = index, columns="measurement_type", values="amount")
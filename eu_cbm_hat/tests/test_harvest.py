@@ -0,0 +1,110 @@
+"""
+Test the harvest post processing on small synthetic data
+
+Execute the test suite from bash with py.test as follows:
+
+    cd ~/repos/eu_cbm/eu_cbm_hat/eu_cbm_hat
+    pytest
+
+"""
+
+from types import SimpleNamespace
+import pandas
+import pytest
+from eu_cbm_hat.post_processor import PostProcessor
+from eu_cbm_hat.post_processor.harvest import DIST_SILV_PAIRS
+from eu_cbm_hat.post_processor.harvest import DIST_SILV_SETS
+from eu_cbm_hat.post_processor.harvest import DIST_SILV_CORRESP
+
+
+def test_dist_silv_sets_keep_every_practice():
+    assert DIST_SILV_SETS[40] == {"thinnings", "final_cut"}
+    assert DIST_SILV_SETS[41] == {"salvage", "final_cut"}
+    assert DIST_SILV_SETS[411] == {"thinnings", "salvage"}
+    for code, practice in DIST_SILV_PAIRS:
+        assert practice in DIST_SILV_SETS[code]
+
+
+def test_dist_silv_corresp_priority():
+    # Salvage first, then final cut, then thinnings
+    assert DIST_SILV_CORRESP[40] == "final_cut"
+    assert DIST_SILV_CORRESP[41] == "salvage"
+    assert DIST_SILV_CORRESP[401] == "final_cut"
+    assert DIST_SILV_CORRESP[411] == "salvage"
+    assert DIST_SILV_CORRESP[4141] == "salvage"
+    # Disturbance types with a single practice keep it
+    for code, practices in DIST_SILV_SETS.items():
+        if len(practices) == 1:
+            assert {DIST_SILV_CORRESP[code]} == practices
+
+
+POOLS_TO_PRODUCT = [
+    f"{wood}_{pool}"
+    for wood in ["softwood", "hardwood"]
+    for pool in ["merch", "other", "stem_snag", "branch_snag"]
+]
+CLASSIFIERS = ["status", "forest_type", "region", "mgmt_type", "mgmt_strategy",
+               "con_broad", "site_index", "growth_period"]
+
+
+def make_post_processor(tmp_path, pools):
+    """Post processor on synthetic pools and fluxes, with the cached
+    properties read from the model output replaced by small data frames"""
+    yaml_path = tmp_path / "combo.yaml"
+    yaml_path.write_text("irw_frac_by_dist:\n  2020: default\n")
+    fluxes = pandas.DataFrame({
+        "identifier": [1, 2, 1],
+        "timestep": [1, 1, 2],
+        "disturbance_type": [4, 4, 4],
+        "time_since_last_disturbance": [1, 1, 1],
+    })
+    for col in CLASSIFIERS:
+        fluxes[col] = "DF" if col == "forest_type" else "x"
+    for i, col in enumerate(POOLS_TO_PRODUCT):
+        fluxes[col + "_to_product"] = [1.0 + i, 2.0, 3.0]
+    irw_frac = pandas.DataFrame({col: ["DF" if col == "forest_type" else "x"]
+                                 for col in CLASSIFIERS})
+    irw_frac["scenario"] = "default"
+    irw_frac["disturbance_type"] = 4
+    for col in POOLS_TO_PRODUCT:
+        irw_frac[col + "_irw_frac"] = 0.5
+    wood = pandas.DataFrame({"forest_type": ["DF"], "wood_density": [0.5], "bark_frac": [0.1]})
+    post_processor = PostProcessor.__new__(PostProcessor)
+    runner = SimpleNamespace(combo=SimpleNamespace(short_name="reference", yaml_path=yaml_path))
+    post_processor.runner = runner
+    post_processor.__dict__.update(
+        pools=pools, fluxes=fluxes, irw_frac=irw_frac, wood_density_bark_frac=wood
+    )
+    return post_processor
+
+
+def test_area_by_identifier_timestep(tmp_path):
+    pools = pandas.DataFrame({"identifier": [2, 1, 1, 3],
+                              "timestep": [1, 1, 2, 1],
+                              "area": [20.0, 10.0, 11.0, 30.0]})
+    post_processor = make_post_processor(tmp_path, pools)
+    area = post_processor.area_by_identifier_timestep
+    assert area.loc[(1, 2)] == 11.0
+    df = post_processor.harvest.provided
+    assert df[["identifier", "timestep", "area"]].values.tolist() == [
+        [1, 1, 10.0], [2, 1, 20.0], [1, 2, 11.0]
+    ]
+
+
+def test_area_by_identifier_timestep_duplicated(tmp_path):
+    pools = pandas.DataFrame({"identifier": [1, 1, 2],
+                              "timestep": [1, 1, 1],
+                              "area": [10.0, 10.0, 20.0]})
+    post_processor = make_post_processor(tmp_path, pools)
+    with pytest.raises(ValueError, match="more than one row"):
+        post_processor.area_by_identifier_timestep
+
+
+def test_harvest_provided_missing_area(tmp_path):
+    # No pools row for identifier 1 at timestep 2
+    pools = pandas.DataFrame({"identifier": [1, 2],
+                              "timestep": [1, 1],
+                              "area": [10.0, 20.0]})
+    post_processor = make_post_processor(tmp_path, pools)
+    with pytest.raises(ValueError, match="No area"):
+        post_processor.harvest.provided
@@ -0,0 +1,113 @@
+"""
+Test the Net Annual Increment computations on small synthetic data frames
+
+Execute the test suite from bash with py.test as follows:
+
+    cd ~/repos/eu_cbm/eu_cbm_hat/eu_cbm_hat
+    pytest
+
+"""
+
+import numpy as np
+import pandas
+import pytest
+from eu_cbm_hat.post_processor.nai import POOLS_COLS, FLUXES_COLS
+from eu_cbm_hat.post_processor.nai import add_nf_fluxes_to_foraws
+from eu_cbm_hat.post_processor.nai import compute_nai_gai
+
+
+def make_nai_agg(statuses=("ForAWS", "NF", "AR"), years=(2020, 2021, 2022)):
+    """Aggregated pools and fluxes, one row per year and status, in an order
+    which is not the order of the groups"""
+    rng = np.random.default_rng(1)
+    index = pandas.MultiIndex.from_product([years, statuses], names=["year", "status"])
+    df = index.to_frame(index=False)
+    df["area"] = rng.uniform(10, 100, len(df))
+    for col in POOLS_COLS + FLUXES_COLS:
+        df[col] = rng.uniform(0, 50, len(df))
+    return df.sample(frac=1, random_state=2).reset_index(drop=True)
+
+
+def test_compute_nai_gai_missing_values_count_as_zero():
+    df = make_nai_agg()
+    df.loc[0, "merch_prod_vol"] = np.nan
+    df.loc[1, "turnover_merch_input_vol"] = np.nan
+    result = compute_nai_gai(df.copy(), groupby=["status"])
+    # Increments as row sums that skip missing values, including the missing
+    # stock difference on the first year of each group
+    nai_merch = result[["net_merch", "merch_prod_vol", "dist_merch_input_vol"]].sum(axis=1)
+    gai_merch = pandas.concat(
+        [nai_merch, result[["turnover_merch_input_vol", "merch_air_vol"]]], axis=1
+    ).sum(axis=1)
+    np.testing.assert_allclose(result["nai_merch"], nai_merch)
+    np.testing.assert_allclose(result["gai_merch"], gai_merch)
+    np.testing.assert_allclose(result["nai_merch_ha"], nai_merch / result["area"])
+    assert result[["nai_merch", "gai_merch", "nai_agb", "gai_agb"]].notna().all().all()
+
+
+def test_compute_nai_gai_stock_difference_within_groups():
+    df = make_nai_agg()
+    expected = df.sort_values(["status", "year"])
+    net = expected.groupby("status")[POOLS_COLS].diff()
+    result = compute_nai_gai(df.copy(), groupby=["status"]).loc[expected.index]
+    np.testing.assert_array_equal(result["net_merch"], net["merch_stock_vol"])
+    np.testing.assert_array_equal(result["net_agb"], net["agb_stock_vol"])
+    # The first year of each group has no stock difference
+    assert result.loc[result["year"] == 2020, "net_merch"].isna().all()
+    assert result.loc[result["year"] > 2020, "net_merch"].notna().all()
+
+
+def test_compute_nai_gai_several_groupby_variables():
+    df = make_nai_agg()
+    df = pandas.concat([df.assign(con_broad="con"), df.assign(con_broad="broad")],
+                       ignore_index=True)
+    groupby = ["status", "con_broad"]
+    expected = df.sort_values(groupby + ["year"])
+    net = expected.groupby(groupby)["merch_stock_vol"].diff()
+    result = compute_nai_gai(df.copy(), groupby=groupby).loc[expected.index]
+    np.testing.assert_array_equal(result["net_merch"], net)
+
+
+def test_compute_nai_gai_rejects_year_and_duplicates():
+    df = make_nai_agg()
+    with pytest.raises(ValueError, match="year"):
+        compute_nai_gai(df.copy(), groupby=["year", "status"])
+    with pytest.raises(ValueError, match="duplications"):
+        compute_nai_gai(pandas.concat([df, df.iloc[[0]]]), groupby=["status"])
+
+
+def test_add_nf_fluxes_to_foraws():
+    df = make_nai_agg(years=(2020, 2021))
+    # No NF row in 2021
+    df = df[~((df["status"] == "NF") & (df["year"] == 2021))].reset_index(drop=True)
+    orig = df.copy()
+    add_nf_fluxes_to_foraws(df, ["status"])
+    fluxes_cols_nf = [x.replace("_vol", "_vol_nf") for x in FLUXES_COLS]
+    nf_2020 = orig.query("status == 'NF' and year == 2020")[FLUXES_COLS].to_numpy()
+    for year, nf_fluxes in [(2020, nf_2020), (2021, np.zeros((1, len(FLUXES_COLS))))]:
+        selector = (df["status"] == "ForAWS") & (df["year"] == year)
+        np.testing.assert_allclose(
+            df.loc[selector, FLUXES_COLS].to_numpy(),
+            orig.loc[selector, FLUXES_COLS].to_numpy() + nf_fluxes,
+        )
+        np.testing.assert_allclose(df.loc[selector, fluxes_cols_nf].to_numpy(), nf_fluxes)
+    # Other statuses keep their fluxes and have no NF fluxes
+    selector = df["status"] != "ForAWS"
+    pandas.testing.assert_frame_equal(df.loc[selector, FLUXES_COLS], orig.loc[selector, FLUXES_COLS])
+    assert (df.loc[selector, fluxes_cols_nf] == 0).all().all()
+
+
+def test_add_nf_fluxes_to_foraws_other_groupby_variables():
+    df = make_nai_agg(statuses=("ForAWS", "NF"), years=(2020,))
+    df = pandas.concat([df.assign(forest_type="DF"), df.assign(forest_type="QR")],
+                       ignore_index=True)
+    df.loc[df["forest_type"] == "QR", FLUXES_COLS] *= 2
+    orig = df.copy()
+    add_nf_fluxes_to_foraws(df, ["status", "forest_type"])
+    for forest_type in ["DF", "QR"]:
+        foraws = (orig["status"] == "ForAWS") & (orig["forest_type"] == forest_type)
+        nf = (orig["status"] == "NF") & (orig["forest_type"] == forest_type)
+        np.testing.assert_allclose(
+            df.loc[foraws, FLUXES_COLS].to_numpy(),
+            orig.loc[foraws, FLUXES_COLS].to_numpy() + orig.loc[nf, FLUXES_COLS].to_numpy(),
+        )
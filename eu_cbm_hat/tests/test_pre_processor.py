@@ -0,0 +1,163 @@
+"""
+Test the pre processor on small synthetic data frames and CSV files
+
+Execute the test suite from bash with py.test as follows:
+
+    cd ~/repos/eu_cbm/eu_cbm_hat/eu_cbm_hat
+    pytest
+
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import pandas
+import pytest
+from eu_cbm_hat.pump.pre_processor import PreProcessor
+from eu_cbm_hat.pump.pre_processor import pack_id_pairs
+from eu_cbm_hat.pump.pre_processor import replace_dist_matrix_values
+
+
+def make_dm():
+    """Default disturbance matrix values for 2 matrices with 2 source pools
+    and 2 sink pools each"""
+    index = pandas.MultiIndex.from_product(
+        [[1, 2], [10, 11], [20, 21]],
+        names=["disturbance_matrix_id", "source_pool_id", "sink_pool_id"],
+    )
+    dm = index.to_frame(index=False)
+    dm["proportion"] = 0.5
+    return dm
+
+
+def test_replace_dist_matrix_values_new_matrix():
+    # A disturbance matrix which is not in the default values is added
+    dm = make_dm()
+    dm_new = pandas.DataFrame({"disturbance_matrix_id": [3],
+                               "source_pool_id": [10],
+                               "sink_pool_id": [20],
+                               "proportion": [1.0]})
+    df = replace_dist_matrix_values(dm, dm_new)
+    assert len(df) == len(dm) + 1
+    assert df.loc[df["disturbance_matrix_id"] == 3, "proportion"].tolist() == [1.0]
+
+
+def test_replace_dist_matrix_values_replace_all_rows():
+    dm = make_dm()
+    dm_new = dm.assign(proportion=0.25)
+    with pytest.raises(ValueError, match="replace every row"):
+        replace_dist_matrix_values(dm, dm_new)
+
+
+def test_replace_dist_matrix_values_same_as_merge():
+    rng = np.random.default_rng(1)
+    index = pandas.MultiIndex.from_product(
+        [range(1, 30), range(25), range(25)],
+        names=["disturbance_matrix_id", "source_pool_id", "sink_pool_id"],
+    )
+    dm = index.to_frame(index=False).sample(frac=0.3, random_state=1)
+    dm["proportion"] = rng.uniform(size=len(dm))
+    dm_new = dm.sample(n=200, random_state=2).assign(proportion=0.1)
+    ids = ["disturbance_matrix_id", "source_pool_id", "sink_pool_id"]
+    # Rows kept by the previous implementation, with a merge indicator
+    df_match = dm.merge(dm_new, on=ids, how="right")
+    df_match_id = df_match.value_counts(
+        ["disturbance_matrix_id", "source_pool_id"]
+    ).reset_index()
+    expected = dm.merge(df_match_id, how="left", indicator=True)
+    expected = expected.loc[expected["_merge"] == "left_only", ids + ["proportion"]]
+    expected = pandas.concat([expected, dm_new[ids + ["proportion"]]])
+    expected = expected.sort_values(ids).reset_index(drop=True).reset_index()
+    df = replace_dist_matrix_values(dm, dm_new)
+    pandas.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("value", [-1, 2**32])
+def test_pack_id_pairs_out_of_range(value):
+    first = pandas.Series([1, 2], name="disturbance_matrix_id")
+    second = pandas.Series([3, value], name="source_pool_id")
+    with pytest.raises(ValueError, match="source_pool_id"):
+        pack_id_pairs(first, second)
+    with pytest.raises(ValueError, match="source_pool_id"):
+        pack_id_pairs(second, first)
+
+
+def test_pack_id_pairs():
+    first = pandas.Series([0, 1, 2**32 - 1])
+    second = pandas.Series([2**32 - 1, 0, 5])
+    keys = pack_id_pairs(first, second)
+    assert len(np.unique(keys)) == 3
+    np.testing.assert_array_equal(keys >> np.uint64(32), first)
+    np.testing.assert_array_equal(keys & np.uint64(2**32 - 1), second)
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "input.csv"
+    path.write_text(text)
+    return path
+
+
+def test_read_csv_table(tmp_path):
+    path = write_csv(tmp_path, "a,b,step\n1,x,3\n4,,-6\n")
+    table = PreProcessor.read_csv_table(path)
+    assert table.num_rows == 2
+    assert table.column("b").null_count == 1
+    table = PreProcessor.read_csv_table(path, columns=["step"])
+    assert table.column_names == ["step"]
+
+
+def test_read_csv_table_empty_file(tmp_path):
+    assert PreProcessor.read_csv_table(write_csv(tmp_path, "")) is None
+
+
+def test_read_csv_table_falls_back_on_pandas(tmp_path):
+    # pyarrow refuses lines with fewer separators than the header, pandas
+    # fills them with missing values
+    path = write_csv(tmp_path, "a,b,c\n1,2,3\n4\n")
+    table = PreProcessor.read_csv_table(path)
+    pandas.testing.assert_frame_equal(table.to_pandas(), pandas.read_csv(path))
+
+
+@pytest.mark.parametrize("text, num_empty", [
+    ("a,b,c\n1,x,3\n4,y,6\n", 0),
+    ("a,b,c\n", 0),
+    ("", 0),
+    ("a,b,c\n1,x,3\n,,\n\n,,\n", 2),
+    ("a,b\nx,y\n,\n", 1),
+    ("a,b\nNA,NaN\n1,2\n", 1),
+    # Handled by the pandas fallback
+    ("a,b,c\n1,2,3\n,\n", 1),
+])
+def test_raise_empty_lines(tmp_path, text, num_empty):
+    path = write_csv(tmp_path, text)
+    # Same count of empty lines as with pandas
+    if text:
+        assert pandas.read_csv(path).isna().all(axis=1).sum() == num_empty
+    if num_empty == 0:
+        PreProcessor.raise_empty_lines(path)
+    else:
+        with pytest.raises(Exception, match=f"has {num_empty} empty lines"):
+            PreProcessor.raise_empty_lines(path)
+
+
+def test_raise_bad_timestep(tmp_path):
+    path = write_csv(tmp_path, "a,step\nx,1\ny,-1\nz,-2\n")
+    pre_processor = PreProcessor.__new__(PreProcessor)
+    pre_processor.input = SimpleNamespace(paths=SimpleNamespace(events=path))
+    with pytest.raises(Exception, match="has 2 negative values"):
+        pre_processor.raise_bad_timestep()
+    path.write_text("a,step\nx,1\ny,0\n")
+    pre_processor.raise_bad_timestep()
+
+
+@pytest.mark.parametrize("text", [
+    # One column without missing values, no line can be empty
+    "a,b,c\n1,,3\n4,y,\n",
+    # Missing values in every column but never on the same line
+    "a,b,c\n1,,3\n,y,\n",
+])
+def test_raise_empty_lines_missing_values_on_some_columns(tmp_path, text):
+    path = write_csv(tmp_path, text)
+    table = PreProcessor.read_csv_table(path)
+    assert table.column("b").null_count == 1
+    assert pandas.read_csv(path).isna().all(axis=1).sum() == 0
+    PreProcessor.raise_empty_lines(path)
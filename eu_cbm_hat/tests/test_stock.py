@@ -0,0 +1,68 @@
+"""
+Test the dead wood stock indicators on small synthetic data frames
+
+Execute the test suite from bash with py.test as follows:
+
+    cd ~/repos/eu_cbm/eu_cbm_hat/eu_cbm_hat
+    pytest
+
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import pandas
+from eu_cbm_hat.post_processor.stock import Stock
+
+
+def make_stock():
+    """Stock object on pools where there is no softwood merchantable stock
+    in 2030"""
+    pools = pandas.DataFrame({
+        "year": [2025, 2025, 2030, 2030],
+        "age": [5, 25, 5, 25],
+        "area": [10.0, 20.0, 10.0, 20.0],
+        "softwood_stem_snag": [1.0, 2.0, 3.0, 4.0],
+        "softwood_merch": [10.0, 20.0, 0.0, 0.0],
+        "hardwood_stem_snag": [1.0, 1.0, 1.0, 1.0],
+        "hardwood_merch": [5.0, 5.0, 5.0, 5.0],
+        "medium_soil": [2.0, 2.0, 2.0, 2.0],
+    })
+    runner = SimpleNamespace(combo=SimpleNamespace(short_name="reference"))
+    parent = SimpleNamespace(runner=runner, pools=pools, fluxes=pandas.DataFrame())
+    return Stock(parent)
+
+
+def test_dw_stock_ratio_zero_merch():
+    stock = make_stock()
+    df = stock.dw_stock_ratio("year").set_index("year")
+    assert df.loc[2025, "softwood_standing_dw_ratio"] == 3.0 / 30.0
+    # No merchantable stock gives a missing ratio, not an infinite one
+    assert np.isnan(df.loc[2030, "softwood_standing_dw_ratio"])
+    assert df.loc[2030, "hardwood_standing_dw_ratio"] == 2.0 / 10.0
+    assert not np.isinf(df.select_dtypes("number").to_numpy()).any()
+
+
+def test_dw_stock_ratio_returns_copies():
+    stock = make_stock()
+    df = stock.dw_stock_ratio("year")
+    df["new_column"] = 1
+    assert "new_column" not in stock.dw_stock_ratio("year").columns
+
+
+def test_dw_merch_stock_age_class_keeps_pools():
+    stock = make_stock()
+    orig = stock.pools.copy()
+    df = stock.dw_merch_stock_age_class("year")
+    assert set(df["age_class"]) == {"AGEID1", "AGEID3"}
+    # The shared pools table is not modified
+    pandas.testing.assert_frame_equal(stock.pools, orig)
+
+
+def test_dw_merch_stock_age_class_zero_merch():
+    stock = make_stock()
+    df = stock.dw_merch_stock_age_class("year")
+    df = df.set_index(["year", "age_class"])
+    assert df.loc[(2025, "AGEID3"), "softwood_standing_dw_ratio"] == 2.0 / 20.0
+    assert np.isnan(df.loc[(2030, "AGEID1"), "softwood_standing_dw_ratio"])
+    assert np.isnan(df.loc[(2030, "AGEID3"), "softwood_standing_dw_ratio"])
+    assert not np.isinf(df.select_dtypes("number").to_numpy()).any()